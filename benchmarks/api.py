@@ -0,0 +1,240 @@
+"""
+Throughput and latency of every User, Team and ProjectBoard method, plus
+startup time and memory, at several data scales.
+
+Run from the directory containing the project, e.g.
+``python -m AP21110011352_Fact_Wise_2.benchmarks.api --scales small medium --output run.json``.
+Pass ``--compare`` a previous run's file to flag methods that got slower.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from ..concrete.project_board import ProjectBoard
+from ..concrete.sqlite_backend import SqliteBackend
+from ..concrete.storage import SNAPSHOT_BINARY, FlushPolicy, JsonBackend
+from ..concrete.store import DataStore
+from ..concrete.team import Team
+from ..concrete.user import User
+from .synthetic import SCALES, Dataset, populate
+
+BACKENDS = {
+    'json': lambda db_dir, **options: JsonBackend(db_dir, **options),
+    'json-sharded': lambda db_dir, **options: JsonBackend(db_dir, shard_tasks=True, **options),
+    'json-binary': lambda db_dir, **options: JsonBackend(db_dir, snapshot_format=SNAPSHOT_BINARY, **options),
+    'sqlite': lambda db_dir, **options: SqliteBackend(os.path.join(db_dir, 'planner.sqlite3')),
+}
+
+STATUSES = ('OPEN', 'IN_PROGRESS', 'COMPLETE')
+BATCH = 10
+
+
+def latency_summary(latencies: List[float]) -> dict:
+    ordered = sorted(latencies)
+    total = sum(ordered)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {
+        "calls": len(ordered),
+        "throughput": round(len(ordered) / total, 1) if total else None,
+        "p50_ms": round(percentile(0.5) * 1000, 4),
+        "p99_ms": round(percentile(0.99) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+def run_calls(call: Callable[[int], object], iterations: int) -> dict:
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        call(i)
+        latencies.append(time.perf_counter() - start)
+    return latency_summary(latencies)
+
+
+def api_calls(store: DataStore, data: Dataset, iterations: int, seed: int) -> Dict[str, Callable[[int], object]]:
+    """
+    One request generator per public method, in the order they are run. Reads
+    come first; mutations create their own users, teams and boards where they
+    would otherwise exhaust the dataset (team capacity, closable boards).
+    """
+    rng = random.Random(seed)
+    users, teams, boards = User(store), Team(store), ProjectBoard(store)
+    dumps = json.dumps
+
+    # Fixtures for the calls that consume state
+    spare_teams = [json.loads(teams.create_team(dumps({"name": f"bench-spare-{i}", "description": "",
+                                                        "admin": data.user_ids[0]})))['id']
+                   for i in range(iterations)]
+    empty_boards = [json.loads(boards.create_board(dumps({"name": f"bench-empty-{i}", "description": "",
+                                                          "team_id": data.team_ids[0],
+                                                          "creation_time": "2024-01-01T00:00:00"})))['id']
+                    for i in range(iterations)]
+    members = [rng.sample(data.user_ids, min(5, len(data.user_ids))) for _ in range(iterations)]
+
+    def pick(ids: list) -> str:
+        return rng.choice(ids)
+
+    def task(i: int, j: int = 0) -> dict:
+        return {"title": f"bench-task-{i}-{j}", "description": "", "user_id": pick(data.user_ids),
+                "creation_time": "2024-01-01T00:00:00", "board_id": pick(data.board_ids)}
+
+    return {
+        'User.list_users': lambda i: users.list_users(),
+        'User.describe_user': lambda i: users.describe_user(dumps({"id": pick(data.user_ids)})),
+        'User.get_user_teams': lambda i: users.get_user_teams(dumps({"id": pick(data.user_ids)})),
+        'Team.list_teams': lambda i: teams.list_teams(),
+        'Team.describe_team': lambda i: teams.describe_team(dumps({"id": pick(data.team_ids)})),
+        'Team.list_team_users': lambda i: teams.list_team_users(dumps({"id": pick(data.team_ids)})),
+        'ProjectBoard.list_boards': lambda i: boards.list_boards(dumps({"id": pick(data.team_ids)})),
+        'ProjectBoard.board_summary': lambda i: boards.board_summary(dumps({"id": pick(data.board_ids)})),
+        'ProjectBoard.export_board': lambda i: boards.export_board(dumps({"id": pick(data.board_ids)})),
+        'ProjectBoard.export_boards': lambda i: boards.export_boards(
+            dumps({"ids": rng.sample(data.board_ids, min(BATCH, len(data.board_ids)))})),
+        'ProjectBoard.export_team': lambda i: boards.export_team(dumps({"id": pick(data.team_ids)})),
+        'User.create_user': lambda i: users.create_user(dumps({"name": f"bench-user-{i}", "display_name": ""})),
+        'User.create_users': lambda i: users.create_users(dumps(
+            {"users": [{"name": f"bench-users-{i}-{j}", "display_name": ""} for j in range(BATCH)]})),
+        'User.update_user': lambda i: users.update_user(
+            dumps({"id": pick(data.user_ids), "user": {"display_name": f"Renamed {i}"}})),
+        'Team.create_team': lambda i: teams.create_team(
+            dumps({"name": f"bench-team-{i}", "description": "", "admin": pick(data.user_ids)})),
+        'Team.update_team': lambda i: teams.update_team(dumps({"id": data.team_ids[i % len(data.team_ids)], "team": {
+            "name": f"team-{i % len(data.team_ids)}", "description": f"Updated {i}", "admin": pick(data.user_ids)}})),
+        'Team.add_users_to_team': lambda i: teams.add_users_to_team(dumps({"id": spare_teams[i], "users": members[i]})),
+        'Team.remove_users_from_team': lambda i: teams.remove_users_from_team(
+            dumps({"id": spare_teams[i], "users": members[i]})),
+        'ProjectBoard.create_board': lambda i: boards.create_board(dumps({
+            "name": f"bench-board-{i}", "description": "", "team_id": pick(data.team_ids),
+            "creation_time": "2024-01-01T00:00:00"})),
+        'ProjectBoard.add_task': lambda i: boards.add_task(dumps(task(i))),
+        'ProjectBoard.add_tasks': lambda i: boards.add_tasks(
+            dumps({"tasks": [task(iterations + i, j) for j in range(BATCH)]})),
+        'ProjectBoard.update_task_status': lambda i: boards.update_task_status(
+            dumps({"id": pick(data.task_ids), "status": rng.choice(STATUSES)})),
+        'ProjectBoard.update_task_statuses': lambda i: boards.update_task_statuses(dumps(
+            {"updates": [{"id": pick(data.task_ids), "status": rng.choice(STATUSES)} for _ in range(BATCH)]})),
+        'ProjectBoard.close_board': lambda i: boards.close_board(dumps({"id": empty_boards[i]})),
+    }
+
+
+def open_store(backend: str, db_dir: str, **options) -> DataStore:
+    return DataStore(backend=BACKENDS[backend](db_dir, **options))
+
+
+def load_all(store: DataStore):
+    for name in ('users', 'teams', 'boards', 'tasks'):
+        store.collection(name).hydrate()
+
+
+def measure_startup(backend: str, db_dir: str) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    store = open_store(backend, db_dir)
+    load_all(store)
+    elapsed = time.perf_counter() - start
+    store.close()
+    return elapsed
+
+
+def measure_memory(backend: str, db_dir: str) -> int:
+    gc.collect()
+    tracemalloc.start()
+    store = open_store(backend, db_dir)
+    load_all(store)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    store.close()
+    return size
+
+
+def run_scale(name: str, backend: str, iterations: int, seed: int) -> dict:
+    scale = SCALES[name]
+    root = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    try:
+        # Exports are written under the working directory
+        os.chdir(root)
+        db_dir = os.path.join(root, 'db')
+        start = time.perf_counter()
+        store = open_store(backend, db_dir, flush_policy=FlushPolicy('on_close')) if backend != 'sqlite' \
+            else open_store(backend, db_dir)
+        data = populate(store, scale, seed)
+        store.close()
+        populate_seconds = time.perf_counter() - start
+
+        result = {
+            "scale": scale._asdict(),
+            "tasks": len(data.task_ids),
+            "populate_seconds": round(populate_seconds, 3),
+            "startup_seconds": round(measure_startup(backend, db_dir), 4),
+            "memory_bytes": measure_memory(backend, db_dir),
+            "methods": {},
+        }
+        store = open_store(backend, db_dir)
+        for method, call in api_calls(store, data, iterations, seed).items():
+            result["methods"][method] = run_calls(call, iterations)
+        store.close()
+        return result
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root)
+
+
+def compare(current: dict, previous: dict, threshold: float) -> List[str]:
+    """Methods whose p50 latency grew by more than ``threshold`` times since ``previous``."""
+    regressions = []
+    for scale, result in current["scales"].items():
+        old_methods = previous.get("scales", {}).get(scale, {}).get("methods", {})
+        for method, stats in result["methods"].items():
+            old = old_methods.get(method)
+            if old and old["p50_ms"] and stats["p50_ms"] > old["p50_ms"] * threshold:
+                regressions.append(f"{scale} {method}: p50 {old['p50_ms']}ms -> {stats['p50_ms']}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', nargs='+', choices=sorted(SCALES), default=['small'])
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='json')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="a previous run's JSON file to compare with")
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args()
+
+    results = {
+        "backend": args.backend,
+        "iterations": args.iterations,
+        "python": sys.version.split()[0],
+        "scales": {name: run_scale(name, args.backend, args.iterations, args.seed) for name in args.scales},
+    }
+    report = json.dumps(results, indent=4)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(report)
+    else:
+        print(report)
+
+    if args.compare:
+        with open(args.compare, 'r') as previous_file:
+            regressions = compare(results, json.load(previous_file), args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Memory held by the task collection as parsed JSON objects versus records.
+
+Run from the directory containing the project, e.g.
+``python -m AP21110011352_Fact_Wise_2.benchmarks.memory --tasks 1000000``.
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+import uuid
+
+from ..concrete.codec import COMPACT
+from ..concrete.records import Task
+
+
+def synthetic_tasks(count: int, boards: int, users: int) -> str:
+    board_ids = [str(uuid.uuid4()) for _ in range(boards)]
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    return COMPACT.dumps({
+        str(uuid.uuid4()): {
+            "title": f"Task {i}",
+            "description": "Synthetic task",
+            "user_id": user_ids[i % users],
+            "creation_time": "2024-01-01T00:00:00",
+            "board_id": board_ids[i % boards],
+            "status": ("OPEN", "IN_PROGRESS", "COMPLETE")[i % 3]
+        }
+        for i in range(count)
+    })
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--boards', type=int, default=100)
+    parser.add_argument('--users', type=int, default=1000)
+    args = parser.parse_args()
+
+    content = synthetic_tasks(args.tasks, args.boards, args.users)
+    dicts = measure(lambda: COMPACT.loads(content))
+    records = measure(lambda: {key: Task.from_dict(value) for key, value in COMPACT.loads(content).items()})
+
+    print(json.dumps({
+        "tasks": args.tasks,
+        "dict_bytes": dicts,
+        "record_bytes": records,
+        "bytes_per_task": {"dict": dicts // args.tasks, "record": records // args.tasks},
+        "reduction": round(1 - records / dicts, 3)
+    }, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Time to load the task collection from JSON and from binary snapshots.
+
+Run from the directory containing the project, e.g.
+``python -m AP21110011352_Fact_Wise_2.benchmarks.startup --tasks 1000000``.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from ..concrete.codec import COMPACT
+from ..concrete.convert import convert
+from ..concrete.storage import SNAPSHOT_BINARY, SNAPSHOT_JSON, JsonBackend
+from .memory import synthetic_tasks
+
+
+def load_time(db_dir: str, snapshot_format: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        backend = JsonBackend(db_dir, snapshot_format=snapshot_format)
+        start = time.perf_counter()
+        backend.collection('tasks').hydrate()
+        timings.append(time.perf_counter() - start)
+        backend.close()
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--boards', type=int, default=100)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        json_dir = os.path.join(root, 'json')
+        backend = JsonBackend(json_dir)
+        tasks = backend.collection('tasks')
+        tasks.hydrate()
+        tasks.put_many(COMPACT.loads(synthetic_tasks(args.tasks, args.boards, args.users)))
+        backend.rewrite_snapshots(('tasks',))
+        backend.close()
+
+        binary_dir = os.path.join(root, 'binary')
+        shutil.copytree(json_dir, binary_dir)
+        convert(binary_dir, SNAPSHOT_BINARY)
+
+        results = {}
+        for snapshot_format, db_dir, file_name in ((SNAPSHOT_JSON, json_dir, 'tasks.json'),
+                                                    (SNAPSHOT_BINARY, binary_dir, 'tasks.snap')):
+            results[snapshot_format] = {
+                "bytes": os.path.getsize(os.path.join(db_dir, file_name)),
+                "seconds": round(load_time(db_dir, snapshot_format, args.repeat), 4)
+            }
+        results["speedup"] = round(results[SNAPSHOT_JSON]["seconds"] / results[SNAPSHOT_BINARY]["seconds"], 2)
+        print(json.dumps({"tasks": args.tasks, **results}, indent=4))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Synthetic planner data, created through the public APIs.
+"""
+import json
+import random
+from typing import List, NamedTuple
+
+from ..concrete.project_board import ProjectBoard
+from ..concrete.store import DataStore
+from ..concrete.team import Team
+from ..concrete.user import User
+
+BATCH_SIZE = 1000
+TEAM_CAPACITY = 50
+
+
+class Scale(NamedTuple):
+    users: int
+    teams: int
+    boards_per_team: int
+    tasks_per_board: int
+
+    @property
+    def tasks(self) -> int:
+        return self.teams * self.boards_per_team * self.tasks_per_board
+
+
+SCALES = {
+    'small': Scale(users=1000, teams=50, boards_per_team=4, tasks_per_board=50),
+    'medium': Scale(users=10000, teams=500, boards_per_team=4, tasks_per_board=50),
+    'large': Scale(users=100000, teams=2000, boards_per_team=5, tasks_per_board=100),
+}
+
+
+class Dataset(NamedTuple):
+    user_ids: List[str]
+    team_ids: List[str]
+    board_ids: List[str]
+    task_ids: List[str]
+
+
+def populate(store: DataStore, scale: Scale, seed: int = 0) -> Dataset:
+    """
+    Fill ``store`` with ``scale``'s users, teams of up to 50 members, boards
+    and tasks, using the batch endpoints where there are any.
+    """
+    rng = random.Random(seed)
+    users, teams, boards = User(store), Team(store), ProjectBoard(store)
+
+    user_ids = []
+    for start in range(0, scale.users, BATCH_SIZE):
+        batch = [{"name": f"user-{i}", "display_name": f"User {i}"}
+                 for i in range(start, min(start + BATCH_SIZE, scale.users))]
+        user_ids += json.loads(users.create_users(json.dumps({"users": batch})))['ids']
+
+    team_ids = []
+    for i in range(scale.teams):
+        admin = rng.choice(user_ids)
+        team_id = json.loads(teams.create_team(json.dumps(
+            {"name": f"team-{i}", "description": f"Team {i}", "admin": admin})))['id']
+        members = [user_id for user_id in rng.sample(user_ids, min(TEAM_CAPACITY, len(user_ids)))
+                   if user_id != admin][:rng.randint(0, TEAM_CAPACITY - 1)]
+        teams.add_users_to_team(json.dumps({"id": team_id, "users": members}))
+        team_ids.append(team_id)
+
+    board_ids = []
+    task_ids = []
+    for team_index, team_id in enumerate(team_ids):
+        for i in range(scale.boards_per_team):
+            board_id = json.loads(boards.create_board(json.dumps({
+                "name": f"board-{team_index}-{i}", "description": "Synthetic board", "team_id": team_id,
+                "creation_time": "2024-01-01T00:00:00"})))['id']
+            board_ids.append(board_id)
+            tasks = [{"title": f"task-{j}", "description": "Synthetic task", "user_id": rng.choice(user_ids),
+                      "creation_time": "2024-01-01T00:00:00", "board_id": board_id}
+                     for j in range(scale.tasks_per_board)]
+            if tasks:
+                task_ids += json.loads(boards.add_tasks(json.dumps({"tasks": tasks})))['ids']
+
+    return Dataset(user_ids, team_ids, board_ids, task_ids)
@@ -0,0 +1,127 @@
+import asyncio
+import functools
+from concurrent.futures import Executor
+
+from .project_board import ProjectBoard
+from .store import DataStore
+from .team import Team
+from .user import User
+
+
+class _AsyncFacade:
+    """
+    Awaitable counterpart of a concrete API class.
+
+    Calls that write or render files run in ``executor`` (the loop's default
+    executor when omitted). Reads are answered from memory on the event loop
+    when the collections they use are loaded and their read locks are free;
+    otherwise they would load files or wait for a writer, so they run in the
+    executor too. That covers the first read of each collection, reads while
+    a mutation or compaction holds a collection, and every read of a shared
+    store or a backend that reads from disk. The store must be thread-safe
+    because inline reads and the executor run concurrently.
+    """
+
+    _target_class = None
+
+    def __init__(self, store: DataStore, executor: Executor = None):
+        if not store.locking:
+            raise ValueError("The async API requires a thread-safe DataStore")
+        self.store = store
+        self.target = self._target_class(store)
+        self._executor = executor
+
+    async def _offload(self, method, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args))
+
+    async def _read(self, method, *args):
+        held = self.store.try_read(method.collections)
+        if held is None:
+            return await self._offload(method, *args)
+        with held:
+            return method(*args)
+
+
+class AsyncUser(_AsyncFacade):
+    _target_class = User
+
+    async def create_user(self, request: str) -> str:
+        return await self._offload(self.target.create_user, request)
+
+    async def create_users(self, request: str) -> str:
+        return await self._offload(self.target.create_users, request)
+
+    async def list_users(self, request: str = None) -> str:
+        return await self._read(self.target.list_users, request)
+
+    async def describe_user(self, request: str) -> str:
+        return await self._read(self.target.describe_user, request)
+
+    async def update_user(self, request: str) -> str:
+        return await self._offload(self.target.update_user, request)
+
+    async def get_user_teams(self, request: str) -> str:
+        return await self._read(self.target.get_user_teams, request)
+
+
+class AsyncTeam(_AsyncFacade):
+    _target_class = Team
+
+    async def create_team(self, request: str) -> str:
+        return await self._offload(self.target.create_team, request)
+
+    async def list_teams(self, request: str = None) -> str:
+        return await self._read(self.target.list_teams, request)
+
+    async def describe_team(self, request: str) -> str:
+        return await self._read(self.target.describe_team, request)
+
+    async def update_team(self, request: str) -> str:
+        return await self._offload(self.target.update_team, request)
+
+    async def add_users_to_team(self, request: str):
+        return await self._offload(self.target.add_users_to_team, request)
+
+    async def remove_users_from_team(self, request: str):
+        return await self._offload(self.target.remove_users_from_team, request)
+
+    async def list_team_users(self, request: str):
+        return await self._read(self.target.list_team_users, request)
+
+
+class AsyncProjectBoard(_AsyncFacade):
+    _target_class = ProjectBoard
+
+    async def create_board(self, request: str) -> str:
+        return await self._offload(self.target.create_board, request)
+
+    async def close_board(self, request: str) -> str:
+        return await self._offload(self.target.close_board, request)
+
+    async def board_summary(self, request: str) -> str:
+        return await self._read(self.target.board_summary, request)
+
+    async def add_task(self, request: str) -> str:
+        return await self._offload(self.target.add_task, request)
+
+    async def add_tasks(self, request: str) -> str:
+        return await self._offload(self.target.add_tasks, request)
+
+    async def update_task_status(self, request: str):
+        return await self._offload(self.target.update_task_status, request)
+
+    async def update_task_statuses(self, request: str) -> str:
+        return await self._offload(self.target.update_task_statuses, request)
+
+    async def list_boards(self, request: str) -> str:
+        return await self._read(self.target.list_boards, request)
+
+    async def export_board(self, request: str) -> str:
+        return await self._offload(self.target.export_board, request)
+
+    async def export_boards(self, request: str) -> str:
+        return await self._offload(self.target.export_boards, request)
+
+    async def export_team(self, request: str) -> str:
+        return await self._offload(self.target.export_team, request)
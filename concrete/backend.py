@@ -0,0 +1,180 @@
+import hashlib
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager, nullcontext
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+COLLECTIONS = ('users', 'teams', 'boards', 'tasks')
+
+NO_PHASE = nullcontext()
+
+
+class Collection(ABC):
+    """
+    One named collection of JSON records as seen by the concrete API classes.
+
+    ``records`` is a read-only mapping from id to record, an instance of the
+    collection's type in concrete/records.py; every change goes through
+    ``put``, ``put_many`` or ``delete`` so that the backend can persist it and
+    keep its indexes current. Records are replaced, never mutated in place.
+    Backends may load lazily: ``locked()`` and ``hydrate()`` make sure
+    ``records`` is populated.
+    """
+
+    records = None
+    name = None
+    instrumentation = None
+
+    def _phase(self, phase: str) -> AbstractContextManager:
+        # Time spent inside counts towards the current instrumented call, if any
+        if self.instrumentation is None:
+            return NO_PHASE
+        return self.instrumentation.phase(phase)
+
+    @abstractmethod
+    def add_index(self, field: str, multi: bool = False):
+        """Return an index whose ``get(value)`` lists the keys holding ``value`` in ``field``."""
+
+    @abstractmethod
+    def add_unique(self, field: str, scope: str = None):
+        """Return a constraint whose ``is_taken(value, scope_value, exclude_key)`` checks ``field``."""
+
+    @abstractmethod
+    def add_counter(self, field: str, count_field: str):
+        """Return a counter whose ``counts(value)`` maps each ``count_field`` value to its records holding ``value``."""
+
+    @abstractmethod
+    def add_digest(self, field: str):
+        """Return an index whose ``digest(value)`` changes whenever a record holding ``value`` in ``field`` does."""
+
+    @abstractmethod
+    def put(self, key: str, value: dict):
+        pass
+
+    @abstractmethod
+    def put_many(self, records: dict):
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def locked(self, exclusive: bool = False) -> AbstractContextManager:
+        pass
+
+    def scan(self, cursor: str = None) -> Iterator[Tuple[str, str, dict]]:
+        """
+        Yield ``(cursor, key, record)`` in insertion order, resuming after
+        ``cursor``. Backends should override this to resume without listing
+        every key, as this fallback does.
+        """
+        for key_cursor, key in scan_keys(list(self.records), cursor):
+            yield key_cursor, key, self.records[key]
+
+    def hydrate(self):
+        """Load the collection unless it already is; called before every transaction touching it."""
+
+    def try_locked(self) -> Optional[AbstractContextManager]:
+        """
+        The shared side of ``locked()`` if it can be had without loading
+        anything or waiting for a writer, else None. Backends that read from
+        disk on every call keep this default.
+        """
+        return None
+
+    def load(self):
+        pass
+
+    def compact(self, wait: bool = True):
+        pass
+
+    @property
+    def dirty(self) -> bool:
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class StorageBackend(ABC):
+    """
+    Where a DataStore keeps its collections.
+
+    ``shared`` backends may be used by several processes at once, and
+    ``locking`` backends need every API call to run inside a transaction.
+    """
+
+    shared = False
+    locking = False
+    instrumentation = None
+
+    @abstractmethod
+    def collection(self, name: str) -> Collection:
+        pass
+
+    def flush(self):
+        pass
+
+    @abstractmethod
+    def close(self):
+        pass
+
+
+def scan_keys(keys: Sequence[str], cursor: str = None) -> Iterator[Tuple[str, str]]:
+    """
+    Yield ``(cursor, key)`` for each of ``keys`` after ``cursor``, for short
+    lists such as a team's members or a team's boards.
+    """
+    start = 0 if cursor is None else resume_position(keys, cursor, lambda key: _find(keys, key))
+    for position in range(start, len(keys)):
+        yield f"{position}:{keys[position]}", keys[position]
+
+
+def resume_position(keys: Sequence[Optional[str]], cursor: str, locate: Callable[[str], Optional[int]]) -> int:
+    """
+    Where a scan of ``keys`` continues after ``cursor``, which holds the
+    position and the key of the last entry returned. The key is normally still
+    at that position; if entries before it were removed, ``locate`` finds where
+    it moved. If the key itself was removed, the scan continues at its old
+    position: right after it when it left a gap (None), or where the next
+    entries moved down to otherwise.
+    """
+    position, _, key = cursor.partition(':')
+    if not position.isdigit():
+        raise ValueError("Invalid cursor")
+    position = int(position)
+    if position < len(keys) and keys[position] == key:
+        return position + 1
+    current = locate(key)
+    if current is not None:
+        return current + 1
+    if position < len(keys) and keys[position] is None:
+        return position + 1
+    return min(position, len(keys))
+
+
+def _find(keys: Sequence[str], key: str) -> Optional[int]:
+    try:
+        return keys.index(key)
+    except ValueError:
+        return None
+
+
+def records_digest(rows: Iterable[Tuple[str, str]]) -> str:
+    """Digest of ``(key, encoded record)`` pairs, whatever order they come in."""
+    digest = hashlib.blake2b(digest_size=16)
+    for key, data in sorted(rows):
+        digest.update(f"{key}\t{data}\n".encode())
+    return digest.hexdigest()
+
+
+def migrate(source: StorageBackend, target: StorageBackend, names: tuple = COLLECTIONS):
+    """Copy every record of ``names`` from one backend to another."""
+    for name in names:
+        source_collection = source.collection(name)
+        target_collection = target.collection(name)
+        with source_collection.locked(), target_collection.locked(exclusive=True):
+            target_collection.put_many({key: source_collection.records[key] for key in source_collection.records})
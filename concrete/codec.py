@@ -0,0 +1,67 @@
+import functools
+import json
+from collections.abc import Mapping
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class JsonCodec:
+    """
+    Serialization of API responses and stored records.
+
+    The compact form has no indentation and ``(',', ':')`` separators, and is
+    produced by orjson or msgspec when either is installed, falling back to the
+    stdlib. ``pretty`` keeps the stdlib's four-space indentation for humans
+    reading responses. Both forms parse to the same values. Any other mapping,
+    such as the records in concrete/records.py, is written as a JSON object.
+    """
+
+    def __init__(self, pretty: bool = False, fast: bool = True):
+        self.pretty = pretty
+        self._encode = None
+        self._decode = None
+        if fast and orjson is not None:
+            self._encode = functools.partial(orjson.dumps, default=_mapping)
+            self._decode = orjson.loads
+        elif fast and msgspec is not None:
+            self._encode = msgspec.json.Encoder(enc_hook=_mapping).encode
+            self._decode = _msgspec_decode
+
+    def dumps(self, value) -> str:
+        if self.pretty:
+            return json.dumps(value, indent=4, default=_mapping)
+        if self._encode is not None:
+            return self._encode(value).decode()
+        return json.dumps(value, separators=(',', ':'), default=_mapping)
+
+    def loads(self, content):
+        """Parse ``content`` (str or bytes), raising json.JSONDecodeError if it is malformed."""
+        if self._decode is not None:
+            return self._decode(content)
+        return json.loads(content)
+
+
+def _mapping(value) -> dict:
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _msgspec_decode(content):
+    try:
+        return msgspec.json.decode(content)
+    except msgspec.DecodeError as e:
+        raise json.JSONDecodeError(str(e), content if isinstance(content, str) else content.decode(errors='replace'),
+                                   0) from e
+
+
+COMPACT = JsonCodec()
+PRETTY = JsonCodec(pretty=True)
@@ -0,0 +1,41 @@
+"""
+Rewrite the snapshots of a JSON backend in another format.
+
+Run from the directory containing the project, e.g.
+``python -m AP21110011352_Fact_Wise_2.concrete.convert ../db binary``. Sharded
+task folders are detected from their manifest. The collections keep loading
+from the old format until they are converted, so this can run at any time
+the API is not serving from the same folder.
+"""
+import argparse
+import json
+import os
+
+from .storage import SNAPSHOT_EXTENSIONS, JsonBackend
+
+
+def convert(db_dir: str, snapshot_format: str):
+    manifest_path = os.path.join(db_dir, 'tasks', 'manifest.json')
+    shard_tasks = os.path.isdir(os.path.join(db_dir, 'tasks'))
+    shard_buckets = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as manifest_file:
+            shard_buckets = json.load(manifest_file)['buckets']
+    backend = JsonBackend(db_dir, snapshot_format=snapshot_format, shard_tasks=shard_tasks,
+                          shard_buckets=shard_buckets)
+    try:
+        backend.rewrite_snapshots()
+    finally:
+        backend.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('db_dir')
+    parser.add_argument('format', choices=sorted(SNAPSHOT_EXTENSIONS))
+    args = parser.parse_args()
+    convert(args.db_dir, args.format)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+import csv
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Tuple
+
+EXPORT_DIR = 'out'
+CHUNK_SIZE = 1 << 16
+
+TASK_COLUMNS = ('title', 'description', 'user_id', 'status', 'creation_time')
+
+
+def write_text(out, board_id: str, board: dict, tasks: Iterable[Tuple[str, dict]]):
+    out.write(f"Board: {board['name']}\nDescription: {board['description']}\nCreation Time: {board['creation_time']}\nStatus: {board['status']}\n\nTasks:\n")
+    for _, task in tasks:
+        out.write(f"Task: {task['title']}\nDescription: {task['description']}\nAssigned to: {task['user_id']}\nStatus: {task['status']}\nCreation Time: {task['creation_time']}\n\n")
+
+
+def write_csv(out, board_id: str, board: dict, tasks: Iterable[Tuple[str, dict]]):
+    writer = csv.writer(out)
+    writer.writerow(('id',) + TASK_COLUMNS)
+    for task_id, task in tasks:
+        writer.writerow((task_id,) + tuple(task[column] for column in TASK_COLUMNS))
+
+
+def write_jsonl(out, board_id: str, board: dict, tasks: Iterable[Tuple[str, dict]]):
+    out.write(json.dumps({"type": "board", "id": board_id, **board}) + '\n')
+    for task_id, task in tasks:
+        out.write(json.dumps({"type": "task", "id": task_id, **task}) + '\n')
+
+
+def write_markdown(out, board_id: str, board: dict, tasks: Iterable[Tuple[str, dict]]):
+    out.write(f"# {board['name']}\n\n{board['description']}\n\n"
+              f"- **Creation Time:** {board['creation_time']}\n- **Status:** {board['status']}\n\n## Tasks\n\n"
+              "| Title | Description | Assigned to | Status | Creation Time |\n| --- | --- | --- | --- | --- |\n")
+    for _, task in tasks:
+        out.write('| ' + ' | '.join(_markdown_cell(task[column]) for column in TASK_COLUMNS) + ' |\n')
+
+
+def _markdown_cell(value) -> str:
+    return str(value).replace('|', '\\|').replace('\n', ' ')
+
+
+EXPORT_FORMATS = {
+    'txt': ('txt', write_text),
+    'csv': ('csv', write_csv),
+    'jsonl': ('jsonl', write_jsonl),
+    'md': ('md', write_markdown),
+}
+
+
+def export_path(board_id: str, export_format: str) -> str:
+    extension, _ = EXPORT_FORMATS[export_format]
+    return os.path.join(EXPORT_DIR, f"board_{board_id}.{extension}")
+
+
+def write_export(board_id: str, board: dict, tasks: Iterable[Tuple[str, dict]], export_format: str = 'txt',
+                 version: str = None, output_file: str = None) -> str:
+    """
+    Stream a board and its tasks to ``output_file``, ``out/board_<id>.<ext>``
+    by default. Tasks are consumed one at a time through a buffered handle, so
+    memory stays bounded by the buffer rather than the board. The file is
+    renamed into place when complete and, given the board's export
+    ``version``, stamped with it for ExportCache.
+
+    The stamp names the file it describes, and is installed before that file,
+    so a stamp left by a concurrent render of other content never matches.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError("Unsupported export format")
+    _, writer = EXPORT_FORMATS[export_format]
+    output_file = output_file or export_path(board_id, export_format)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    tmp_file = f"{output_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_file, 'w', buffering=CHUNK_SIZE, newline='') as out:
+        writer(out, board_id, board, tasks)
+    if version is not None:
+        with open(tmp_file + '.version', 'w') as version_file:
+            version_file.write(f"{version} {_file_identity(os.stat(tmp_file))}")
+        os.replace(tmp_file + '.version', output_file + '.version')
+    os.replace(tmp_file, output_file)
+    return output_file
+
+
+class ExportCache:
+    """
+    Reuses board exports whose ``.version`` stamp matches the board's export
+    version, a digest of the board and its tasks.
+
+    When a board changed since its last export, the existing file is returned
+    marked stale and a fresh one is rendered in the background from a snapshot
+    of the board's tasks; a board with no export yet is rendered immediately.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='export')
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def export(self, board_id: str, board: dict, tasks: Callable[[], Iterable[Tuple[str, dict]]], version: str,
+               export_format: str = 'txt') -> Tuple[str, bool]:
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError("Unsupported export format")
+        output_file = export_path(board_id, export_format)
+        if is_current(board_id, version, export_format):
+            return output_file, False
+        if not os.path.exists(output_file):
+            return write_export(board_id, board, tasks(), export_format, version), False
+
+        key = (board_id, export_format)
+        with self._lock:
+            if key not in self._pending:
+                # Records are replaced rather than mutated, so a list of the
+                # current ones is a consistent view for the worker.
+                self._pending[key] = self._executor.submit(self._regenerate, key, board, list(tasks()), version)
+        return output_file, True
+
+    def _regenerate(self, key: tuple, board: dict, tasks: list, version: str):
+        board_id, export_format = key
+        try:
+            write_export(board_id, board, tasks, export_format, version)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def wait(self):
+        with self._lock:
+            pending = list(self._pending.values())
+        wait(pending)
+
+
+EXPORT_CACHE = ExportCache()
+
+
+def is_current(board_id: str, version: str, export_format: str) -> bool:
+    output_file = export_path(board_id, export_format)
+    try:
+        with open(output_file + '.version', 'r') as version_file:
+            stamp = version_file.read()
+        identity = _file_identity(os.stat(output_file))
+    except FileNotFoundError:
+        return False
+    return stamp == f"{version} {identity}"
+
+
+class RenderPool:
+    """
+    Worker processes for rendering many boards at once, started on first use
+    and kept for the life of the process.
+
+    Workers come from a ``forkserver`` (``spawn`` where that is unavailable)
+    rather than a fork of this process, which already runs the flusher,
+    compaction and export threads. Batches smaller than ``min_tasks`` tasks
+    in total, or of a single board, are rendered in the calling process, as
+    shipping them to a worker would cost more than rendering them.
+    """
+
+    def __init__(self, max_workers: int = None, min_tasks: int = 5000):
+        self.max_workers = max_workers
+        self.min_tasks = min_tasks
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def render(self, jobs: list, export_format: str = 'txt') -> dict:
+        if len(jobs) < 2 or sum(len(tasks) for _, _, tasks, _ in jobs) < self.min_tasks:
+            return {board_id: write_export(board_id, board, tasks, export_format, version)
+                    for board_id, board, tasks, version in jobs}
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError("Unsupported export format")
+        executor = self._pool()
+        # Workers keep the working directory they were started in, so they get absolute paths
+        out_files = {board_id: export_path(board_id, export_format) for board_id, _, _, _ in jobs}
+        futures = [executor.submit(write_export, board_id, board, tasks, export_format, version,
+                                   os.path.abspath(out_files[board_id]))
+                   for board_id, board, tasks, version in jobs]
+        for future in futures:
+            future.result()
+        return out_files
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._executor = ProcessPoolExecutor(self.max_workers,
+                                                     mp_context=multiprocessing.get_context(start_method))
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+RENDER_POOL = RenderPool()
+
+
+def render_exports(jobs: list, export_format: str = 'txt') -> dict:
+    """
+    Render ``(board_id, board, tasks, version)`` jobs, one board per worker
+    task of RENDER_POOL, and return the output file of each board.
+    """
+    if not jobs:
+        return {}
+    return RENDER_POOL.render(jobs, export_format)
+
+
+def _file_identity(stat: os.stat_result) -> str:
+    # Which file a stamp describes: a rename keeps both, a new render changes them
+    return f"{stat.st_ino}:{stat.st_mtime_ns}"
@@ -0,0 +1,206 @@
+from typing import Iterator, Tuple
+
+from .backend import records_digest, resume_position
+from .codec import COMPACT
+
+
+class Index:
+    """
+    Secondary index from a field value to the keys of the records holding it.
+
+    Keys are kept in insertion order. When ``multi`` is set the field holds a
+    list and every distinct element is indexed, e.g. a team's ``users``; an
+    update only touches the elements that were added or removed.
+    """
+
+    def __init__(self, field: str, multi: bool = False):
+        self.field = field
+        self.multi = multi
+        self._keys = {}
+        self._values = {}
+
+    def _extract(self, record: dict) -> tuple:
+        value = record.get(self.field)
+        if self.multi:
+            return tuple(dict.fromkeys(value or ()))
+        return (value,)
+
+    def rebuild(self, records: dict):
+        self._keys = {}
+        self._values = {}
+        for key, record in records.items():
+            self.update(key, record)
+
+    def update(self, key: str, record: dict):
+        values = self._extract(record)
+        old_values = self._values.get(key, ())
+        if values == old_values:
+            return
+        if old_values:
+            current = set(values)
+            for value in old_values:
+                if value not in current:
+                    self._discard(value, key)
+        for value in values:
+            self._keys.setdefault(value, {})[key] = None
+        self._values[key] = values
+
+    def remove(self, key: str):
+        for value in self._values.pop(key, ()):
+            self._discard(value, key)
+
+    def _discard(self, value, key: str):
+        keys = self._keys.get(value)
+        if keys is None:
+            return
+        keys.pop(key, None)
+        if not keys:
+            del self._keys[value]
+
+    def get(self, value) -> list:
+        return list(self._keys.get(value, ()))
+
+    def __contains__(self, value) -> bool:
+        return value in self._keys
+
+
+class UniqueIndex(Index):
+    """
+    Hashed uniqueness constraint on a field, optionally scoped by another field
+    (board names per team, task titles per board).
+    """
+
+    def __init__(self, field: str, scope: str = None):
+        super().__init__(field)
+        self.scope = scope
+
+    def _extract(self, record: dict) -> tuple:
+        scope_value = record.get(self.scope) if self.scope else None
+        return ((scope_value, record.get(self.field)),)
+
+    def is_taken(self, value, scope_value=None, exclude_key: str = None) -> bool:
+        keys = self._keys.get((scope_value, value), ())
+        return any(key != exclude_key for key in keys)
+
+
+class CountIndex:
+    """
+    Number of records per value of ``count_field`` within each value of
+    ``field``, e.g. the tasks of each board by status. Kept current on every
+    write like the other indexes, so reading the counts of a value is O(1).
+    """
+
+    def __init__(self, field: str, count_field: str):
+        self.field = field
+        self.count_field = count_field
+        self._counts = {}
+        self._values = {}
+
+    def rebuild(self, records: dict):
+        self._counts = {}
+        self._values = {}
+        for key, record in records.items():
+            self.update(key, record)
+
+    def update(self, key: str, record: dict):
+        values = (record.get(self.field), record.get(self.count_field))
+        old_values = self._values.get(key)
+        if values == old_values:
+            return
+        if old_values is not None:
+            self._discard(*old_values)
+        counts = self._counts.setdefault(values[0], {})
+        counts[values[1]] = counts.get(values[1], 0) + 1
+        self._values[key] = values
+
+    def remove(self, key: str):
+        values = self._values.pop(key, None)
+        if values is not None:
+            self._discard(*values)
+
+    def _discard(self, value, count_value):
+        counts = self._counts[value]
+        counts[count_value] -= 1
+        if not counts[count_value]:
+            del counts[count_value]
+        if not counts:
+            del self._counts[value]
+
+    def counts(self, value) -> dict:
+        return dict(self._counts.get(value, ()))
+
+
+class DigestIndex(Index):
+    """
+    Digest of the records holding each value of ``field``, e.g. the tasks of a
+    board, to tell whether anything derived from them is out of date. A
+    digest is computed when first asked for and kept until a write touches
+    one of those records; it depends on their content only, so it is the same
+    in every process and after a reload.
+    """
+
+    def __init__(self, field: str):
+        super().__init__(field)
+        self._records = {}
+        self._digests = {}
+
+    def rebuild(self, records: dict):
+        self._records = records
+        self._digests = {}
+        super().rebuild(records)
+
+    def update(self, key: str, record: dict):
+        for value in self._values.get(key, ()) + self._extract(record):
+            self._digests.pop(value, None)
+        super().update(key, record)
+
+    def remove(self, key: str):
+        for value in self._values.get(key, ()):
+            self._digests.pop(value, None)
+        super().remove(key)
+
+    def digest(self, value) -> str:
+        digest = self._digests.get(value)
+        if digest is None:
+            rows = ((key, COMPACT.dumps(self._records[key])) for key in self._keys.get(value, ()))
+            digest = self._digests[value] = records_digest(rows)
+        return digest
+
+
+class ScanOrder:
+    """
+    The keys in insertion order, each at a fixed position, so that a scan
+    resumes from a cursor in O(1) instead of skipping over every key before it.
+
+    A removed key leaves a gap that scans step over, so the other keys never
+    move and a cursor whose key was removed still resumes right after it. Gaps
+    are dropped when the order is rebuilt on load.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._positions = {}
+
+    def rebuild(self, records: dict):
+        self._keys = list(records)
+        self._positions = {key: position for position, key in enumerate(self._keys)}
+
+    def update(self, key: str, record: dict):
+        if key not in self._positions:
+            self._positions[key] = len(self._keys)
+            self._keys.append(key)
+
+    def remove(self, key: str):
+        position = self._positions.pop(key, None)
+        if position is not None:
+            self._keys[position] = None
+
+    def scan(self, cursor: str = None) -> Iterator[Tuple[str, str]]:
+        """Yield ``(cursor, key)`` for each key after ``cursor``."""
+        position = 0 if cursor is None else resume_position(self._keys, cursor, self._positions.get)
+        # Keys appended while the scan runs are included
+        while position < len(self._keys):
+            key = self._keys[position]
+            if key is not None:
+                yield f"{position}:{key}", key
+            position += 1
@@ -0,0 +1,233 @@
+import bisect
+import cProfile
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PHASES = ('parse', 'validate', 'mutate', 'persist', 'serialize')
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BYTES_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+
+class Histogram:
+    """Counts per upper bound, as in a Prometheus histogram, plus the running sum."""
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> dict:
+        buckets = {}
+        total = 0
+        for bound, count in zip(self.bounds + ('+Inf',), self.counts):
+            total += count
+            buckets[str(bound)] = total
+        return buckets
+
+
+class CallMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.errors = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+
+
+class Instrumentation:
+    """
+    Opt-in metrics for the User, Team and ProjectBoard APIs of one DataStore.
+
+    Every public method taking a request is timed, and its time is split into
+    phases: ``parse`` and ``serialize`` (the store's codec), ``mutate``
+    (applying changes to the in-memory records and indexes), ``persist``
+    (writing them to the backend) and ``validate``, which is everything else:
+    lookups, checks and building the response. Bytes written are recorded per
+    collection for log appends and snapshots, including those of background
+    flushes and compactions.
+
+    Read the numbers with ``stats()`` or ``write_prometheus()``; with
+    ``prometheus_path`` they are also written there when the store closes.
+    With ``profile_every`` one call in N runs under cProfile and its stats
+    are dumped to ``profile_dir/<method>-<n>.prof``.
+    """
+
+    def __init__(self, prometheus_path: str = None, profile_every: int = None, profile_dir: str = 'profiles'):
+        if profile_every is not None and (type(profile_every) is not int or profile_every < 1):
+            raise ValueError("Invalid profiling interval")
+        self.prometheus_path = prometheus_path
+        self.profile_every = profile_every
+        self.profile_dir = profile_dir
+        self._calls = {}
+        self._writes = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._call_count = 0
+        self._profiling = threading.Lock()
+
+    def instrument(self, api):
+        """Replace the request-taking public methods of ``api`` with timed ones."""
+        prefix = type(api).__name__
+        for name, function in inspect.getmembers(type(api), inspect.isfunction):
+            if name.startswith('_') or list(inspect.signature(function).parameters)[1:2] != ['request']:
+                continue
+            setattr(api, name, self._timed(f'{prefix}.{name}', getattr(api, name)))
+
+    def _timed(self, name: str, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            if getattr(self._local, 'phases', None) is not None:
+                # Called from another instrumented method: part of that call
+                return method(*args, **kwargs)
+            phases = self._local.phases = {}
+            sample = self._start_profile()
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = method(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                self._local.phases = None
+                if sample is not None:
+                    self._finish_profile(*sample, name)
+                self._record_call(name, elapsed, phases, failed)
+        return timed
+
+    @contextmanager
+    def phase(self, name: str):
+        phases = getattr(self._local, 'phases', None)
+        if phases is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+    def _record_call(self, name: str, elapsed: float, phases: dict, failed: bool):
+        with self._lock:
+            metrics = self._calls.get(name)
+            if metrics is None:
+                metrics = self._calls[name] = CallMetrics()
+            metrics.latency.observe(elapsed)
+            metrics.errors += failed
+            for phase, seconds in phases.items():
+                metrics.phases[phase] += seconds
+            metrics.phases['validate'] += max(0.0, elapsed - sum(phases.values()))
+
+    def record_write(self, collection: str, kind: str, size: int):
+        """Account ``size`` bytes written to ``collection``'s log or snapshot."""
+        with self._lock:
+            histogram = self._writes.get((collection, kind))
+            if histogram is None:
+                histogram = self._writes[(collection, kind)] = Histogram(BYTES_BUCKETS)
+            histogram.observe(size)
+
+    def _start_profile(self):
+        if self.profile_every is None:
+            return None
+        with self._lock:
+            self._call_count += 1
+            number = self._call_count
+        # Only one profiler can be active at a time
+        if number % self.profile_every or not self._profiling.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile, number
+
+    def _finish_profile(self, profile: cProfile.Profile, number: int, name: str):
+        profile.disable()
+        self._profiling.release()
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profile.dump_stats(os.path.join(self.profile_dir, f'{name}-{number}.prof'))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": {
+                    name: {
+                        "count": metrics.latency.count,
+                        "errors": metrics.errors,
+                        "seconds": metrics.latency.sum,
+                        "latency_buckets": metrics.latency.cumulative(),
+                        "phases": dict(metrics.phases),
+                    }
+                    for name, metrics in sorted(self._calls.items())
+                },
+                "writes": {
+                    f'{collection}.{kind}': {
+                        "count": histogram.count,
+                        "bytes": histogram.sum,
+                        "bytes_buckets": histogram.cumulative(),
+                    }
+                    for (collection, kind), histogram in sorted(self._writes.items())
+                },
+            }
+
+    def prometheus(self) -> str:
+        stats = self.stats()
+        lines = [
+            '# HELP planner_call_seconds Latency of API calls.',
+            '# TYPE planner_call_seconds histogram',
+        ]
+        for name, call in stats["calls"].items():
+            lines += _histogram_lines('planner_call_seconds', f'method="{name}"', call["latency_buckets"],
+                                      call["seconds"], call["count"])
+        lines += ['# HELP planner_call_errors_total API calls that raised.',
+                  '# TYPE planner_call_errors_total counter']
+        lines += [f'planner_call_errors_total{{method="{name}"}} {call["errors"]}'
+                  for name, call in stats["calls"].items()]
+        lines += ['# HELP planner_call_phase_seconds_total Time spent in each phase of API calls.',
+                  '# TYPE planner_call_phase_seconds_total counter']
+        lines += [f'planner_call_phase_seconds_total{{method="{name}",phase="{phase}"}} {seconds}'
+                  for name, call in stats["calls"].items() for phase, seconds in call["phases"].items()]
+        lines += ['# HELP planner_write_bytes Bytes written per log append or snapshot.',
+                  '# TYPE planner_write_bytes histogram']
+        for target, write in stats["writes"].items():
+            collection, _, kind = target.rpartition('.')
+            lines += _histogram_lines('planner_write_bytes', f'collection="{collection}",kind="{kind}"',
+                                      write["bytes_buckets"], write["bytes"], write["count"])
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str = None):
+        """Write the metrics in the Prometheus text format, replacing the file atomically."""
+        path = path or self.prometheus_path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as metrics_file:
+            metrics_file.write(self.prometheus())
+        os.replace(tmp_path, path)
+
+
+def _histogram_lines(metric: str, labels: str, buckets: dict, total, count: int) -> list:
+    lines = [f'{metric}_bucket{{{labels},le="{bound}"}} {value}' for bound, value in buckets.items()]
+    return lines + [f'{metric}_sum{{{labels}}} {total}', f'{metric}_count{{{labels}}} {count}']
+
+
+class InstrumentedCodec:
+    """A store's codec whose parsing and serialization count as the current call's phases."""
+
+    def __init__(self, codec, instrumentation: Instrumentation):
+        self.codec = codec
+        self.pretty = codec.pretty
+        self._instrumentation = instrumentation
+
+    def loads(self, content):
+        with self._instrumentation.phase('parse'):
+            return self.codec.loads(content)
+
+    def dumps(self, value) -> str:
+        with self._instrumentation.phase('serialize'):
+            return self.codec.dumps(value)
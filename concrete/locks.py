@@ -0,0 +1,88 @@
+import threading
+from contextlib import ExitStack, contextmanager
+
+
+class ReadWriteLock:
+    """
+    Any number of readers or a single writer.
+
+    Waiting writers block new readers, so a steady stream of reads cannot
+    starve mutations. Both sides are re-entrant for the owning thread and the
+    writer may also take the read side; upgrading a read lock is not supported.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    @property
+    def write_depth(self) -> int:
+        return self._writer_depth if self._writer == threading.get_ident() else 0
+
+    def acquire_read(self, blocking: bool = True) -> bool:
+        depth = getattr(self._local, 'read_depth', 0)
+        with self._cond:
+            if depth == 0 and self._writer != threading.get_ident():
+                while self._writer is not None or self._waiting_writers:
+                    if not blocking:
+                        return False
+                    self._cond.wait()
+                self._readers += 1
+        self._local.read_depth = depth + 1
+        return True
+
+    def try_read(self):
+        """The read side as a context manager if it can be taken without waiting, else None."""
+        if not self.acquire_read(blocking=False):
+            return None
+        held = ExitStack()
+        held.callback(self.release_read)
+        return held
+
+    def release_read(self):
+        self._local.read_depth -= 1
+        if self._local.read_depth == 0 and self._writer != threading.get_ident():
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            self._writer_depth -= 1
+            if self._writer_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,72 @@
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+PAGE_SIZE = 100
+
+
+def is_paged(data: dict) -> bool:
+    return 'limit' in data or 'cursor' in data
+
+
+def record_filter(data: dict) -> Callable[[dict], bool]:
+    """
+    Predicate for the list filters in a request: ``name_prefix``, ``status``
+    and a ``created_after`` / ``created_before`` range on ``creation_time``
+    (both exclusive, compared as ISO 8601 strings).
+    """
+    name_prefix = data.get('name_prefix')
+    status = data.get('status')
+    created_after = data.get('created_after')
+    created_before = data.get('created_before')
+
+    def matches(record: dict) -> bool:
+        if name_prefix is not None and not record['name'].startswith(name_prefix):
+            return False
+        if status is not None and record.get('status') != status:
+            return False
+        if created_after is not None or created_before is not None:
+            creation_time = record.get('creation_time')
+            if creation_time is None:
+                return False
+            if created_after is not None and not creation_time > created_after:
+                return False
+            if created_before is not None and not creation_time < created_before:
+                return False
+        return True
+
+    return matches
+
+
+def read_page(entries: Iterable[Tuple[str, str, dict]], data: dict,
+              item: Callable[[str, dict], dict]) -> Tuple[list, Optional[str]]:
+    """
+    Collect the items of the ``(cursor, key, record)`` entries matching the
+    request's filters, up to its ``limit``. Returns the items and the cursor
+    to resume from, or None once the entries are exhausted.
+    """
+    limit = data.get('limit')
+    if limit is not None and (type(limit) is not int or limit < 1):
+        raise ValueError("Invalid limit")
+
+    matches = record_filter(data)
+    items = []
+    previous = None
+    for cursor, key, record in entries:
+        if matches(record):
+            if len(items) == limit:
+                return items, previous
+            items.append(item(key, record))
+        previous = cursor
+    return items, None
+
+
+def iterate_pages(fetch_page: Callable[[dict], Tuple[list, Optional[str]]], filters: dict,
+                  page_size: int = PAGE_SIZE) -> Iterator[dict]:
+    # Each page is fetched in its own transaction, so no lock is held while
+    # the caller consumes the items.
+    data = {**filters, 'limit': page_size}
+    while True:
+        items, cursor = fetch_page(data)
+        yield from items
+        if cursor is None:
+            return
+        data['cursor'] = cursor
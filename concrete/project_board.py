@@ -1,54 +1,55 @@
-import json
-import os
 import uuid
 from datetime import datetime
+from typing import Iterator
 
 from ..project_board_base import ProjectBoardBase
-
-BOARD_DB_PATH = '../db/boards.json'
-TASK_DB_PATH = '../db/tasks.json'
-TEAM_DB_PATH = '../db/teams.json'
+from .exporters import EXPORT_CACHE, EXPORT_FORMATS, export_path, is_current, render_exports
+from .backend import records_digest, scan_keys
+from .codec import COMPACT
+from .records import Board, BoardStatus, Task, TaskStatus
+from .paging import PAGE_SIZE, is_paged, iterate_pages, read_page
+from .responses import cached
+from .store import DataStore, lazy_records, transaction
 
 class ProjectBoard(ProjectBoardBase):
-    def __init__(self):
-        if not os.path.exists(BOARD_DB_PATH):
-            os.makedirs(os.path.dirname(BOARD_DB_PATH), exist_ok=True)
-            with open(BOARD_DB_PATH, 'w') as db_file:
-                json.dump({}, db_file)
-        if not os.path.exists(TASK_DB_PATH):
-            os.makedirs(os.path.dirname(TASK_DB_PATH), exist_ok=True)
-            with open(TASK_DB_PATH, 'w') as db_file:
-                json.dump({}, db_file)
-        if not os.path.exists(TEAM_DB_PATH):
-            os.makedirs(os.path.dirname(TEAM_DB_PATH), exist_ok=True)
-            with open(TEAM_DB_PATH, 'w') as db_file:
-                json.dump({}, db_file)
-        self.load_boards()
-        self.load_tasks()
-        self.load_teams()
+    boards = lazy_records('_boards_db')
+    tasks = lazy_records('_tasks_db')
+    teams = lazy_records('_teams_db')
+
+    def __init__(self, store: DataStore = None):
+        self.store = store or DataStore.default()
+        self._boards_db = self.store.collection('boards')
+        self._tasks_db = self.store.collection('tasks')
+        self._teams_db = self.store.collection('teams')
+        self._boards_by_team = self._boards_db.add_index('team_id')
+        self._tasks_by_board = self._tasks_db.add_index('board_id')
+        self._board_names = self._boards_db.add_unique('name', scope='team_id')
+        self._task_titles = self._tasks_db.add_unique('title', scope='board_id')
+        self._task_statuses = self._tasks_db.add_counter('board_id', 'status')
+        self._task_digests = self._tasks_db.add_digest('board_id')
+        if self.store.instrumentation is not None:
+            self.store.instrumentation.instrument(self)
 
     def load_boards(self):
-        with open(BOARD_DB_PATH, 'r') as db_file:
-            self.boards = json.load(db_file)
+        self._boards_db.load()
+        self.store.invalidate()
 
     def save_boards(self):
-        with open(BOARD_DB_PATH, 'w') as db_file:
-            json.dump(self.boards, db_file, indent=4)
+        self._boards_db.compact()
 
     def load_tasks(self):
-        with open(TASK_DB_PATH, 'r') as db_file:
-            self.tasks = json.load(db_file)
+        self._tasks_db.load()
 
     def save_tasks(self):
-        with open(TASK_DB_PATH, 'w') as db_file:
-            json.dump(self.tasks, db_file, indent=4)
+        self._tasks_db.compact()
 
     def load_teams(self):
-        with open(TEAM_DB_PATH, 'r') as db_file:
-            self.teams = json.load(db_file)
+        self._teams_db.load()
+        self.store.invalidate()
 
+    @transaction(read=('teams',), write=('boards',))
     def create_board(self, request: str) -> str:
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
         board_id = str(uuid.uuid4())
         name = data['name']
         description = data['description']
@@ -61,24 +62,25 @@ class ProjectBoard(ProjectBoardBase):
         if team_id not in self.teams:
             raise ValueError("Team does not exist")
 
-        if name in [board['name'] for board in self.boards.values() if board['team_id'] == team_id]:
+        if self._board_names.is_taken(name, team_id):
             raise ValueError("Board name must be unique for the team")
 
-        board = {
-            "name": name,
-            "description": description,
-            "team_id": team_id,
-            "creation_time": creation_time,
-            "status": "OPEN"
-        }
+        board = Board(
+            name=name,
+            description=description,
+            team_id=team_id,
+            creation_time=creation_time,
+            status=BoardStatus.OPEN
+        )
 
-        self.boards[board_id] = board
-        self.save_boards()
+        self._boards_db.put(board_id, board)
+        self.store.invalidate(('team_boards', team_id))
 
-        return json.dumps({"id": board_id})
+        return self.store.codec.dumps({"id": board_id})
 
+    @transaction(read=('tasks',), write=('boards',))
     def close_board(self, request: str) -> str:
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
         board_id = data['id']
 
         if board_id not in self.boards:
@@ -86,22 +88,40 @@ class ProjectBoard(ProjectBoardBase):
 
         board = self.boards[board_id]
 
-        if board['status'] != "OPEN":
+        if board['status'] != BoardStatus.OPEN:
             raise ValueError("Only open boards can be closed")
 
-        board_tasks = [task for task in self.tasks.values() if task['board_id'] == board_id]
-        if any(task['status'] != "COMPLETE" for task in board_tasks):
+        if any(status != TaskStatus.COMPLETE for status in self._task_statuses.counts(board_id)):
             raise ValueError("All tasks must be complete to close the board")
 
-        board['status'] = "CLOSED"
-        board['end_time'] = datetime.now().isoformat()
-        self.save_boards()
+        self._boards_db.put(board_id, board.replace(status=BoardStatus.CLOSED, end_time=datetime.now().isoformat()))
+        self.store.invalidate(('team_boards', board['team_id']))
 
-        return json.dumps({"status": "success"})
+        return self.store.codec.dumps({"status": "success"})
 
-    def add_task(self, request: str) -> str:
-        data = json.loads(request)
-        task_id = str(uuid.uuid4())
+    @transaction(read=('boards', 'tasks'))
+    def board_summary(self, request: str) -> str:
+        data = self.store.codec.loads(request)
+        board_id = data['id']
+
+        if board_id not in self.boards:
+            raise ValueError("Board not found")
+
+        board = self.boards[board_id]
+        counts = self._task_statuses.counts(board_id)
+        tasks = {status: counts.get(status, 0) for status in TaskStatus.__members__}
+        total = sum(tasks.values())
+
+        return self.store.codec.dumps({
+            "id": board_id,
+            "name": board['name'],
+            "status": board['status'],
+            "tasks": tasks,
+            "total": total,
+            "progress": {status: round(100 * count / total, 1) if total else 0.0 for status, count in tasks.items()}
+        })
+
+    def _build_task(self, data: dict) -> dict:
         title = data['title']
         description = data['description']
         user_id = data['user_id']
@@ -116,75 +136,169 @@ class ProjectBoard(ProjectBoardBase):
 
         board = self.boards[board_id]
 
-        if board['status'] != "OPEN":
+        if board['status'] != BoardStatus.OPEN:
             raise ValueError("Tasks can only be added to open boards")
 
-        if title in [task['title'] for task in self.tasks.values() if task['board_id'] == board_id]:
+        if self._task_titles.is_taken(title, board_id):
             raise ValueError("Task title must be unique for the board")
 
-        task = {
-            "title": title,
-            "description": description,
-            "user_id": user_id,
-            "creation_time": creation_time,
-            "board_id": board_id,
-            "status": "OPEN"
-        }
+        return Task(
+            title=title,
+            description=description,
+            user_id=user_id,
+            creation_time=creation_time,
+            board_id=board_id,
+            status=TaskStatus.OPEN
+        )
 
-        self.tasks[task_id] = task
-        self.save_tasks()
+    @transaction(read=('boards',), write=('tasks',))
+    def add_task(self, request: str) -> str:
+        data = self.store.codec.loads(request)
+        task_id = str(uuid.uuid4())
+        task = self._build_task(data)
 
-        return json.dumps({"id": task_id})
+        self._tasks_db.put(task_id, task)
 
-    def update_task_status(self, request: str):
-        data = json.loads(request)
-        task_id = data['id']
-        status = data['status']
+        return self.store.codec.dumps({"id": task_id})
+
+    @transaction(read=('boards',), write=('tasks',))
+    def add_tasks(self, request: str) -> str:
+        data = self.store.codec.loads(request)
+        tasks = {}
+        titles = set()
+
+        for task_data in data['tasks']:
+            task = self._build_task(task_data)
+            if (task['board_id'], task['title']) in titles:
+                raise ValueError("Task title must be unique for the board")
+            titles.add((task['board_id'], task['title']))
+            tasks[str(uuid.uuid4())] = task
+
+        self._tasks_db.put_many(tasks)
+
+        return self.store.codec.dumps({"ids": list(tasks)})
 
-        if status not in ["OPEN", "IN_PROGRESS", "COMPLETE"]:
+    def _updated_task(self, task_id: str, status: str) -> dict:
+        if status not in TaskStatus.__members__:
             raise ValueError("Invalid status")
 
         if task_id not in self.tasks:
             raise ValueError("Task not found")
 
-        task = self.tasks[task_id]
-        task['status'] = status
-        self.save_tasks()
+        return self.tasks[task_id].replace(status=status)
 
-        return json.dumps({"status": "success"})
+    @transaction(write=('tasks',))
+    def update_task_status(self, request: str):
+        data = self.store.codec.loads(request)
+        task_id = data['id']
+        status = data['status']
+
+        self._tasks_db.put(task_id, self._updated_task(task_id, status))
+
+        return self.store.codec.dumps({"status": "success"})
+
+    @transaction(write=('tasks',))
+    def update_task_statuses(self, request: str) -> str:
+        data = self.store.codec.loads(request)
+        tasks = {}
+
+        for update in data['updates']:
+            tasks[update['id']] = self._updated_task(update['id'], update['status'])
+
+        self._tasks_db.put_many(tasks)
+
+        return self.store.codec.dumps({"status": "success"})
 
+    @cached(lambda data: (('team_boards', data['id']),))
+    @transaction(read=('boards', 'teams'))
     def list_boards(self, request: str) -> str:
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
+
+        if is_paged(data):
+            boards, cursor = self._boards_page(data)
+            return self.store.codec.dumps({"items": boards, "next_cursor": cursor})
+
+        open_boards, _ = self._boards_page({**data, 'limit': None})
+
+        return self.store.codec.dumps(open_boards)
+
+    @transaction(read=('boards', 'teams'))
+    def _boards_page(self, data: dict) -> tuple:
         team_id = data['id']
 
         if team_id not in self.teams:
             raise ValueError("Team not found")
 
-        open_boards = [
-            {"id": board_id, "name": board['name']}
-            for board_id, board in self.boards.items()
-            if board['team_id'] == team_id and board['status'] == "OPEN"
-        ]
+        # Open boards unless the request asks for another status, or for any with null
+        data = {"status": "OPEN", **data}
+        boards = (
+            (cursor, board_id, self.boards[board_id])
+            for cursor, board_id in scan_keys(self._boards_by_team.get(team_id), data.get('cursor'))
+        )
+
+        return read_page(boards, data, lambda board_id, board: {"id": board_id, "name": board['name']})
 
-        return json.dumps(open_boards, indent=4)
+    def iter_boards(self, team_id: str, page_size: int = PAGE_SIZE, **filters) -> Iterator[dict]:
+        return iterate_pages(self._boards_page, {**filters, 'id': team_id}, page_size)
 
+    def _export_version(self, board_id: str, board: dict) -> str:
+        # Changes with the board or any of its tasks, without being stored anywhere
+        return records_digest(((board_id, COMPACT.dumps(board)), ('tasks', self._task_digests.digest(board_id))))
+
+    @transaction(read=('boards', 'tasks'))
     def export_board(self, request: str) -> str:
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
         board_id = data['id']
 
         if board_id not in self.boards:
             raise ValueError("Board not found")
 
         board = self.boards[board_id]
-        tasks = [task for task in self.tasks.values() if task['board_id'] == board_id]
-
-        output = f"Board: {board['name']}\nDescription: {board['description']}\nCreation Time: {board['creation_time']}\nStatus: {board['status']}\n\nTasks:\n"
-        for task in tasks:
-            output += f"Task: {task['title']}\nDescription: {task['description']}\nAssigned to: {task['user_id']}\nStatus: {task['status']}\nCreation Time: {task['creation_time']}\n\n"
-
-        output_file = f"out/board_{board_id}.txt"
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        with open(output_file, 'w') as f:
-            f.write(output)
-
-        return json.dumps({"out_file": output_file})
+        tasks = lambda: ((task_id, self.tasks[task_id]) for task_id in self._tasks_by_board.get(board_id))
+        output_file, stale = EXPORT_CACHE.export(board_id, board, tasks, self._export_version(board_id, board),
+                                                 data.get('format', 'txt'))
+
+        if stale:
+            return self.store.codec.dumps({"out_file": output_file, "stale": True})
+        return self.store.codec.dumps({"out_file": output_file})
+
+    @transaction(read=('boards', 'tasks', 'teams'))
+    def _export_jobs(self, board_ids: list, export_format: str, team_id: str = None) -> tuple:
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError("Unsupported export format")
+
+        if team_id is not None:
+            if team_id not in self.teams:
+                raise ValueError("Team not found")
+            board_ids = self._boards_by_team.get(team_id)
+
+        out_files = {}
+        jobs = []
+        for board_id in board_ids:
+            if board_id not in self.boards:
+                raise ValueError("Board not found")
+            board = self.boards[board_id]
+            out_files[board_id] = export_path(board_id, export_format)
+            version = self._export_version(board_id, board)
+            if not is_current(board_id, version, export_format):
+                tasks = [(task_id, self.tasks[task_id]) for task_id in self._tasks_by_board.get(board_id)]
+                jobs.append((board_id, board, tasks, version))
+
+        return out_files, jobs
+
+    def _export_many(self, board_ids: list, export_format: str, team_id: str = None) -> str:
+        # Snapshot under the read lock, render after releasing it
+        out_files, jobs = self._export_jobs(board_ids, export_format, team_id)
+        out_files.update(render_exports(jobs, export_format))
+
+        return self.store.codec.dumps({"out_files": out_files})
+
+    def export_boards(self, request: str) -> str:
+        data = self.store.codec.loads(request)
+
+        return self._export_many(data['ids'], data.get('format', 'txt'))
+
+    def export_team(self, request: str) -> str:
+        data = self.store.codec.loads(request)
+
+        return self._export_many(None, data.get('format', 'txt'), data['id'])
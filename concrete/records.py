@@ -0,0 +1,154 @@
+import collections
+import itertools
+import sys
+from collections.abc import Mapping
+from enum import Enum
+from typing import Iterable
+
+
+class Status(str, Enum):
+    # Members are the plain strings everywhere: in comparisons, JSON and exports
+    __str__ = str.__str__
+    __format__ = str.__format__
+
+
+class TaskStatus(Status):
+    OPEN = 'OPEN'
+    IN_PROGRESS = 'IN_PROGRESS'
+    COMPLETE = 'COMPLETE'
+
+
+class BoardStatus(Status):
+    OPEN = 'OPEN'
+    CLOSED = 'CLOSED'
+
+
+class Record(Mapping):
+    """
+    Compact, immutable record with one slot per field instead of a dict.
+
+    Records are read-only mappings, so they are indexed, unpacked and filtered
+    exactly like the JSON objects they replace. Optional fields that were never
+    set are simply absent. Ids referencing other records are interned and
+    statuses are enum members, so a million tasks share a handful of strings.
+    Convert with ``from_dict`` and ``dict(record)`` at the JSON boundary, or
+    with ``from_columns`` and ``columns_of`` for binary snapshots; change a
+    field with ``replace``.
+    """
+
+    __slots__ = ()
+    _convert = {}
+
+    def __init__(self, **fields):
+        for field, value in fields.items():
+            if field not in self.__slots__:
+                raise TypeError(f"{type(self).__name__} has no field {field!r}")
+            convert = self._convert.get(field)
+            object.__setattr__(self, field, value if convert is None else convert(value))
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'Record':
+        return data if type(data) is cls else cls(**data)
+
+    @classmethod
+    def from_columns(cls, fields: tuple, columns: list) -> list:
+        """
+        Build one record per row of ``columns``, which hold a list of values for
+        each of ``fields`` with ``...`` where a record lacks the field. Filling
+        a column at a time keeps the per-record work out of Python code.
+        """
+        records = list(map(object.__new__, itertools.repeat(cls, len(columns[0]) if columns else 0)))
+        for field, column in zip(fields, columns):
+            set_value, convert = _setter(cls, field)
+            if ... in column:
+                for record, value in zip(records, column):
+                    if value is not ...:
+                        set_value(record, value if convert is None else convert(value))
+            else:
+                collections.deque(map(set_value, records, column if convert is None else map(convert, column)), 0)
+        return records
+
+    @classmethod
+    def columns_of(cls, records: Iterable['Record']) -> list:
+        """The values of ``records`` as plain data, one list per slot, ``...`` where a field is absent."""
+        records = list(records)
+        return [[_plain(getattr(record, field, ...)) for record in records] for field in cls.__slots__]
+
+    def replace(self, **changes) -> 'Record':
+        return type(self)(**{**self, **changes})
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getitem__(self, field: str):
+        if field in self.__slots__:
+            try:
+                return getattr(self, field)
+            except AttributeError:
+                pass
+        raise KeyError(field)
+
+    def __iter__(self):
+        for field in self.__slots__:
+            if hasattr(self, field):
+                yield field
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __reduce__(self):
+        return type(self).from_dict, (dict(self),)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{field}={value!r}' for field, value in self.items())})"
+
+
+_setters = {}
+
+
+def _setter(cls: type, field: str) -> tuple:
+    # The slot's setter and the conversion of raw values, looked up once per field
+    setter = _setters.get((cls, field))
+    if setter is None:
+        if field not in cls.__slots__:
+            raise TypeError(f"{cls.__name__} has no field {field!r}")
+        convert = cls._convert.get(field)
+        if isinstance(convert, type) and issubclass(convert, Enum):
+            convert = convert._value2member_map_.__getitem__
+        setter = _setters[(cls, field)] = (getattr(cls, field).__set__, convert)
+    return setter
+
+
+def _plain(value):
+    return value.value if isinstance(value, Enum) else value
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _members(values) -> list:
+    # An ordered set: first occurrence wins, so repeated ids count once
+    return list(dict.fromkeys(map(_intern, values)))
+
+
+class User(Record):
+    __slots__ = ('name', 'display_name', 'creation_time')
+
+
+class Team(Record):
+    __slots__ = ('name', 'description', 'creation_time', 'admin', 'users')
+    _convert = {'admin': _intern, 'users': _members}
+
+
+class Board(Record):
+    __slots__ = ('name', 'description', 'team_id', 'creation_time', 'status', 'end_time')
+    _convert = {'team_id': _intern, 'status': BoardStatus}
+
+
+class Task(Record):
+    __slots__ = ('title', 'description', 'user_id', 'creation_time', 'board_id', 'status')
+    _convert = {'user_id': _intern, 'board_id': _intern, 'status': TaskStatus}
+
+
+RECORD_TYPES = {'users': User, 'teams': Team, 'boards': Board, 'tasks': Task}
@@ -0,0 +1,118 @@
+import functools
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+
+class ResponseCache:
+    """
+    Serialized responses of read endpoints, least recently used first out once
+    they hold more than ``max_bytes``.
+
+    Each entry is keyed by method and request and carries the tags of what it
+    was built from, such as ``('teams', team_id)`` for one team or
+    ``('teams',)`` for the whole collection. Mutations call ``invalidate``
+    with the tags they change, which drops exactly the entries that used them.
+    A response computed while an invalidation ran is returned but not stored,
+    so a read racing a write cannot cache the old state.
+    """
+
+    def __init__(self, max_bytes: int):
+        if type(max_bytes) is not int or max_bytes < 1:
+            raise ValueError("Invalid cache size")
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._keys_by_tag = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        """The cached response for ``key``, or None. Also returns the generation to pass to ``put``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, self._generation
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], self._generation
+
+    def put(self, key: tuple, response: str, tags: tuple, generation: int):
+        size = sys.getsizeof(response)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation or key in self._entries:
+                return
+            self._entries[key] = (response, size, tags)
+            self.size += size
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *tags: tuple):
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._keys_by_tag.clear()
+            self.size = 0
+
+    def _remove(self, key: tuple):
+        _, size, tags = self._entries.pop(key)
+        self.size -= size
+        for tag in tags:
+            keys = self._keys_by_tag[tag]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[tag]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def cached(tags: Callable[[dict], tuple]):
+    """
+    Answer a User, Team or ProjectBoard read method from ``self.store.responses``
+    when the store has a response cache. ``tags`` maps the parsed request to
+    the tags the response depends on. Errors are never cached.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request: str = None):
+            responses = self.store.responses
+            if responses is None:
+                return method(self, request)
+            key = (method.__name__, request)
+            response, generation = responses.get(key)
+            if response is None:
+                response = method(self, request)
+                data = self.store.codec.loads(request) if request else {}
+                responses.put(key, response, tags(data), generation)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,293 @@
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+from .backend import Collection, StorageBackend, records_digest
+from .codec import COMPACT
+from .records import RECORD_TYPES
+
+SCAN_BATCH = 500
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Keeps every collection in one SQLite database using the stdlib ``sqlite3``.
+
+    Each collection is a ``(key, data)`` table with the record stored as JSON
+    and converted to its record type when read; indexed fields are backed by
+    expression indexes on ``json_extract``, and list fields (team members) by
+    a side table. Nothing is loaded at startup:
+    records are read and written row by row. Every API call runs in a
+    transaction, writes in ``BEGIN IMMEDIATE``, so the database can be shared
+    by several processes.
+    """
+
+    shared = True
+    locking = True
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.lock = threading.RLock()
+        self._write_depth = 0
+        self._collections = {}
+
+    def collection(self, name: str) -> 'SqliteCollection':
+        with self.lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = SqliteCollection(self, name)
+                collection.instrumentation = self.instrumentation
+                self._collections[name] = collection
+            return collection
+
+    def execute(self, sql: str, parameters: tuple = ()) -> list:
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    @contextmanager
+    def write_transaction(self):
+        with self.lock:
+            if self._write_depth == 0:
+                self.connection.execute('BEGIN IMMEDIATE')
+            self._write_depth += 1
+            try:
+                yield
+            except BaseException:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    self.connection.execute('ROLLBACK')
+                raise
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self.connection.execute('COMMIT')
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+            self._collections = {}
+
+
+class SqliteCollection(Collection):
+    def __init__(self, backend: SqliteBackend, name: str):
+        self.backend = backend
+        self.table = _quote(name)
+        self.name = name
+        self.record_type = RECORD_TYPES.get(name)
+        self.records = SqliteRecords(self)
+        backend.execute(f'CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, data TEXT NOT NULL)')
+        # Side tables persist, so every writer has to maintain them, whether or
+        # not this process asked for the index.
+        self._multi_indexes = {}
+        prefix = f'{name}__'
+        for (table,) in backend.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND substr(name, 1, ?) = ?", (len(prefix), prefix)):
+            field = table[len(prefix):]
+            self._multi_indexes[field] = SqliteMultiIndex(self, field)
+
+    def add_index(self, field: str, multi: bool = False):
+        if not multi:
+            self.backend.execute(
+                f'CREATE INDEX IF NOT EXISTS {_quote(f"{self.name}_{field}")} ON {self.table} ({_extract(field)})')
+            return SqliteIndex(self, field)
+        if field not in self._multi_indexes:
+            self._multi_indexes[field] = SqliteMultiIndex(self, field)
+        return self._multi_indexes[field]
+
+    def add_unique(self, field: str, scope: str = None):
+        columns = f'{_extract(scope)}, {_extract(field)}' if scope else _extract(field)
+        self.backend.execute(
+            f'CREATE INDEX IF NOT EXISTS {_quote(f"{self.name}_{scope}_{field}")} ON {self.table} ({columns})')
+        return SqliteUniqueIndex(self, field, scope)
+
+    def add_counter(self, field: str, count_field: str):
+        self.backend.execute(
+            f'CREATE INDEX IF NOT EXISTS {_quote(f"{self.name}_{field}_{count_field}")} '
+            f'ON {self.table} ({_extract(field)}, {_extract(count_field)})')
+        return SqliteCounter(self, field, count_field)
+
+    def add_digest(self, field: str):
+        self.add_index(field)
+        return SqliteDigest(self, field)
+
+    def put(self, key: str, value: dict):
+        self.put_many({key: value})
+
+    def put_many(self, records: dict):
+        with self._phase('persist'), self.backend.write_transaction():
+            rows = [(key, COMPACT.dumps(value)) for key, value in records.items()]
+            self.backend.connection.executemany(
+                f'INSERT INTO {self.table} (key, data) VALUES (?, ?) '
+                f'ON CONFLICT(key) DO UPDATE SET data = excluded.data', rows)
+            for index in self._multi_indexes.values():
+                index.update(records)
+        if self.instrumentation is not None:
+            self.instrumentation.record_write(self.name, 'rows', sum(len(data.encode()) for _, data in rows))
+
+    def delete(self, key: str):
+        with self._phase('persist'), self.backend.write_transaction():
+            self.backend.connection.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+            for index in self._multi_indexes.values():
+                index.remove(key)
+
+    @contextmanager
+    def locked(self, exclusive: bool = False):
+        if exclusive:
+            with self.backend.write_transaction():
+                yield
+        else:
+            with self.backend.lock:
+                yield
+
+    def scan(self, cursor: str = None):
+        # Cursors are rowids, which follow insertion order and survive updates
+        if cursor is not None and not cursor.isdigit():
+            raise ValueError("Invalid cursor")
+        rowid = int(cursor or 0)
+        sql = f'SELECT rowid, key, data FROM {self.table} WHERE rowid > ? ORDER BY rowid LIMIT ?'
+        while True:
+            rows = self.backend.execute(sql, (rowid, SCAN_BATCH))
+            for rowid, key, data in rows:
+                yield str(rowid), key, self.decode(data)
+            if len(rows) < SCAN_BATCH:
+                return
+
+    def decode(self, data: str):
+        record = COMPACT.loads(data)
+        return record if self.record_type is None else self.record_type.from_dict(record)
+
+    def compact(self, wait: bool = True):
+        self.backend.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+class SqliteRecords(Mapping):
+    """Read-only mapping over a collection table, fetching rows on access."""
+
+    def __init__(self, collection: SqliteCollection):
+        self._collection = collection
+        self._decode = collection.decode
+        self._backend = collection.backend
+        self._table = collection.table
+
+    def __getitem__(self, key: str) -> dict:
+        rows = self._backend.execute(f'SELECT data FROM {self._table} WHERE key = ?', (key,))
+        if not rows:
+            raise KeyError(key)
+        return self._decode(rows[0][0])
+
+    def __contains__(self, key) -> bool:
+        return bool(self._backend.execute(f'SELECT 1 FROM {self._table} WHERE key = ?', (key,)))
+
+    def __iter__(self):
+        return iter([row[0] for row in self._backend.execute(f'SELECT key FROM {self._table} ORDER BY rowid')])
+
+    def __len__(self) -> int:
+        return self._backend.execute(f'SELECT COUNT(*) FROM {self._table}')[0][0]
+
+    def values(self) -> list:
+        rows = self._backend.execute(f'SELECT data FROM {self._table} ORDER BY rowid')
+        return [self._decode(row[0]) for row in rows]
+
+    def items(self) -> list:
+        rows = self._backend.execute(f'SELECT key, data FROM {self._table} ORDER BY rowid')
+        return [(key, self._decode(data)) for key, data in rows]
+
+
+class SqliteIndex:
+    def __init__(self, collection: SqliteCollection, field: str):
+        self._backend = collection.backend
+        self._sql = f'SELECT key FROM {collection.table} WHERE {_extract(field)} = ? ORDER BY rowid'
+
+    def get(self, value) -> list:
+        return [row[0] for row in self._backend.execute(self._sql, (value,))]
+
+    def __contains__(self, value) -> bool:
+        return bool(self.get(value))
+
+
+class SqliteMultiIndex:
+    """Index over a list field, kept in a ``<collection>__<field>`` side table."""
+
+    def __init__(self, collection: SqliteCollection, field: str):
+        self._backend = collection.backend
+        self._field = field
+        self._table = _quote(f'{collection.name}__{field}')
+        with self._backend.write_transaction():
+            exists = self._backend.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f'{collection.name}__{field}',))
+            if not exists:
+                self._backend.execute(f'CREATE TABLE {self._table} (key TEXT NOT NULL, value TEXT NOT NULL)')
+                self._backend.execute(
+                    f'CREATE INDEX {_quote(f"{collection.name}__{field}_value")} ON {self._table} (value)')
+                self._backend.execute(
+                    f'CREATE INDEX {_quote(f"{collection.name}__{field}_key")} ON {self._table} (key)')
+                self._backend.execute(
+                    f'INSERT INTO {self._table} (key, value) SELECT source.key, item.value '
+                    f'FROM {collection.table} AS source, json_each(source.data, ?) AS item', (f'$.{field}',))
+
+    def update(self, records: dict):
+        connection = self._backend.connection
+        connection.executemany(f'DELETE FROM {self._table} WHERE key = ?', [(key,) for key in records])
+        connection.executemany(
+            f'INSERT INTO {self._table} (key, value) VALUES (?, ?)',
+            [(key, value) for key, record in records.items() for value in dict.fromkeys(record.get(self._field) or ())])
+
+    def remove(self, key: str):
+        self._backend.connection.execute(f'DELETE FROM {self._table} WHERE key = ?', (key,))
+
+    def get(self, value) -> list:
+        rows = self._backend.execute(f'SELECT key FROM {self._table} WHERE value = ? ORDER BY rowid', (value,))
+        return [row[0] for row in rows]
+
+    def __contains__(self, value) -> bool:
+        return bool(self.get(value))
+
+
+class SqliteUniqueIndex:
+    def __init__(self, collection: SqliteCollection, field: str, scope: str = None):
+        self._backend = collection.backend
+        condition = f'{_extract(field)} = ?'
+        if scope:
+            condition = f'{_extract(scope)} = ? AND {condition}'
+        self._scoped = bool(scope)
+        self._sql = f'SELECT 1 FROM {collection.table} WHERE {condition} AND key IS NOT ? LIMIT 1'
+
+    def is_taken(self, value, scope_value=None, exclude_key: str = None) -> bool:
+        parameters = (scope_value, value, exclude_key) if self._scoped else (value, exclude_key)
+        return bool(self._backend.execute(self._sql, parameters))
+
+
+class SqliteCounter:
+    """Counts grouped over the ``(field, count_field)`` expression index, without reading the rows."""
+
+    def __init__(self, collection: SqliteCollection, field: str, count_field: str):
+        self._backend = collection.backend
+        self._sql = (f'SELECT {_extract(count_field)}, COUNT(*) FROM {collection.table} '
+                     f'WHERE {_extract(field)} = ? GROUP BY {_extract(count_field)}')
+
+    def counts(self, value) -> dict:
+        return dict(self._backend.execute(self._sql, (value,)))
+
+
+class SqliteDigest:
+    """Digest of the stored rows holding a value, read through the ``field`` expression index."""
+
+    def __init__(self, collection: SqliteCollection, field: str):
+        self._backend = collection.backend
+        self._sql = f'SELECT key, data FROM {collection.table} WHERE {_extract(field)} = ?'
+
+    def digest(self, value) -> str:
+        return records_digest(self._backend.execute(self._sql, (value,)))
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _extract(field: str) -> str:
+    return f"json_extract(data, '$.{field}')"
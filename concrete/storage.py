@@ -0,0 +1,1049 @@
+import atexit
+import gc
+import hashlib
+import io
+import json
+import mmap
+import os
+import pickle
+import struct
+import threading
+import zlib
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .backend import COLLECTIONS, Collection, StorageBackend, records_digest
+from .codec import COMPACT
+from .indexes import CountIndex, DigestIndex, Index, ScanOrder, UniqueIndex
+from .records import RECORD_TYPES
+from .locks import ReadWriteLock
+
+COMPACT_MIN_RECORDS = 1000
+MANIFEST_FORMAT = 1
+
+CHECKSUM_PREFIX = b'{"checksum": "'
+RECORDS_PREFIX = b'", "records": '
+
+SNAPSHOT_JSON = 'json'
+SNAPSHOT_BINARY = 'binary'
+SNAPSHOT_EXTENSIONS = {SNAPSHOT_JSON: '.json', SNAPSHOT_BINARY: '.snap'}
+
+# Binary snapshots: magic, format version and SHA-256 digest (zeros when
+# checksums are off), followed by plain data pickled with protocol 5: the
+# keys, the field names of the collection's record type and a column of
+# values per field.
+BINARY_MAGIC = b'PLANSNAP'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('>8sH32s')
+
+
+class CorruptSnapshotError(ValueError):
+    pass
+
+
+class UnsupportedSnapshotError(ValueError):
+    """An intact snapshot that this code cannot read, so recovering from the previous one would lose data."""
+
+
+FLUSH_ALWAYS = 'always'
+FLUSH_GROUP = 'group'
+FLUSH_ON_CLOSE = 'on_close'
+
+
+class FlushPolicy:
+    """
+    When appended log records reach the file.
+
+    ``always`` writes every mutation before the call returns. ``group`` buffers
+    records and writes them every ``interval_ms`` milliseconds (the owning
+    DataStore runs the timer) or once ``max_pending`` records are waiting.
+    ``on_close`` only writes on an explicit flush, on close or when
+    ``max_pending`` is reached. With ``fsync`` every log write is also forced
+    to stable storage.
+    """
+
+    def __init__(self, mode: str = FLUSH_ALWAYS, interval_ms: int = 50, max_pending: int = 10000, fsync: bool = False):
+        if mode not in (FLUSH_ALWAYS, FLUSH_GROUP, FLUSH_ON_CLOSE):
+            raise ValueError("Invalid flush mode")
+        self.mode = mode
+        self.interval_ms = interval_ms
+        self.max_pending = max_pending
+        self.fsync = fsync
+
+
+class CollectionLog(Collection):
+    """
+    Persistence for one JSON collection as a snapshot plus an append-only log,
+    loaded on first use.
+
+    Every mutation appends a single record to ``<name>.log``; the snapshot
+    ``<name>.json`` is only rewritten by compaction, which runs in a background
+    thread once the log has grown as large as the last snapshot.
+
+    Snapshots are written to a temporary file, fsynced and renamed into place,
+    and carry a SHA-256 checksum unless ``checksum`` is disabled. The previous
+    snapshot and the log that follows it are kept as ``<name>.json.prev`` and
+    ``<name>.log.prev``, so a snapshot that fails verification on startup is
+    recovered from the last good one without losing records.
+
+    ``snapshot_format`` picks JSON (``<name>.json``) or a binary snapshot
+    (``<name>.snap``: a versioned header and the records as pickled plain
+    data, read through mmap), which loads about three times faster. Logs are
+    JSON lines either way.
+    A collection whose only snapshot is in the other format loads from it, and
+    the next compaction replaces it.
+
+    With ``shared`` set, several processes may use the same files. Access goes
+    through ``locked()``, which takes an fcntl lock on ``<name>.lock`` and then
+    catches up with records other processes appended since the last access.
+    Every log starts with a header carrying its generation, bumped on each
+    rotation, so a reader can tell whether it can follow a rotation
+    incrementally or has to reload. Compaction is serialised across processes
+    by ``<name>.compact.lock``.
+
+    With ``thread_safe`` (implied by ``shared``) ``locked()`` also takes an
+    in-process reader/writer lock, so reads run in parallel and only mutations
+    serialise. Catching up with other processes counts as a mutation.
+
+    Given a ``record_type`` from concrete/records.py, records are held as
+    instances of it: loaded and replayed JSON objects are converted, and so
+    are plain dicts passed to ``put`` or ``put_many``.
+    """
+
+    def __init__(self, path: str, compact_min_records: int = COMPACT_MIN_RECORDS, flush_policy: FlushPolicy = None,
+                 checksum: bool = True, shared: bool = False, thread_safe: bool = False, record_type: type = None,
+                 snapshot_format: str = SNAPSHOT_JSON):
+        if shared and fcntl is None:
+            raise ValueError("Shared collections require fcntl file locking")
+        if snapshot_format not in SNAPSHOT_EXTENSIONS:
+            raise ValueError("Invalid snapshot format")
+        base_path = os.path.splitext(path)[0]
+        self.name = os.path.basename(base_path)
+        self.snapshot_format = snapshot_format
+        self.path = base_path + SNAPSHOT_EXTENSIONS[snapshot_format]
+        self.prev_path = self.path + '.prev'
+        self.other_paths = [base_path + extension for extension in SNAPSHOT_EXTENSIONS.values()
+                            if base_path + extension != self.path]
+        self.log_path = base_path + '.log'
+        self.lock_path = base_path + '.lock'
+        self.compact_lock_path = base_path + '.compact.lock'
+        self.rotated_log_path = self.log_path + '.1'
+        self.prev_log_path = self.log_path + '.prev'
+        self.compact_min_records = compact_min_records
+        self.checksum = checksum
+        self.shared = shared
+        self.flush_policy = flush_policy or FlushPolicy()
+        self.record_type = record_type
+        self.records = {}
+        self.indexes = {}
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._log_file = None
+        self._lock_file = None
+        self._rwlock = ReadWriteLock() if shared or thread_safe else None
+        self._flock_mutex = threading.Lock()
+        self._flock_depth = 0
+        self._tail = None
+        self._tail_ino = None
+        self._tail_offset = 0
+        self._log_count = 0
+        self._snapshot_size = 0
+        self._pending = []
+        self._compaction = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self.order = self._attach('order', ScanOrder())
+
+    def add_index(self, field: str, multi: bool = False) -> Index:
+        return self._attach(field, Index(field, multi))
+
+    def add_unique(self, field: str, scope: str = None) -> UniqueIndex:
+        return self._attach(f'unique:{scope}:{field}', UniqueIndex(field, scope))
+
+    def add_counter(self, field: str, count_field: str) -> CountIndex:
+        return self._attach(f'count:{field}:{count_field}', CountIndex(field, count_field))
+
+    def add_digest(self, field: str) -> DigestIndex:
+        return self._attach(f'digest:{field}', DigestIndex(field))
+
+    def _attach(self, name: str, index: Index) -> Index:
+        # Collections are shared, so several consumers may ask for the same index
+        if name in self.indexes:
+            return self.indexes[name]
+        index.rebuild(self.records)
+        self.indexes[name] = index
+        return index
+
+    def scan(self, cursor: str = None):
+        for key_cursor, key in self.order.scan(cursor):
+            yield key_cursor, key, self.records[key]
+
+    def hydrate(self):
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load()
+
+    def try_locked(self):
+        # Shared collections may have to wait on other processes' file locks
+        if self.shared or not self._loaded:
+            return None
+        if self._rwlock is None:
+            return nullcontext()
+        return self._rwlock.try_read()
+
+    def load(self) -> dict:
+        self.close()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if self.shared:
+            self._lock_file = open(self.lock_path, 'a')
+            with self._locked(exclusive=True, refresh=False):
+                self._load()
+        else:
+            self._load()
+        self._loaded = True
+        return self.records
+
+    def _load(self) -> dict:
+        compact_lock = self._acquire_compact_lock(blocking=True)
+        try:
+            self._load_files()
+        finally:
+            _release(compact_lock)
+        return self.records
+
+    def _load_files(self):
+        recovering = False
+        snapshot_path = self.path
+        if not os.path.exists(self.path) and not os.path.exists(self.prev_path):
+            # Written in the other format: read it until the next compaction replaces it
+            snapshot_path = next(filter(os.path.exists, self.other_paths), self.path)
+        with _gc_paused():
+            try:
+                records = self._read_snapshot(snapshot_path)
+            except CorruptSnapshotError:
+                if not os.path.exists(self.prev_path):
+                    raise
+                records = None
+            if records is None and os.path.exists(self.prev_path):
+                # The snapshot is corrupt, or a compaction was interrupted between
+                # retiring the old snapshot and installing the new one.
+                recovering = True
+                records = self._read_snapshot(self.prev_path)
+                logs = [self.prev_log_path, self.rotated_log_path]
+            else:
+                logs = [self.rotated_log_path]
+            # Reload in place so that every holder of ``records`` sees the new state
+            self.records.clear()
+            self.records.update(self._converted(records or {}))
+
+        for log_path in logs:
+            self._replay(log_path)
+        self.generation = 0
+        self._log_count = self._replay(self.log_path)
+        if recovering:
+            self._recover_snapshot(dict(self.records))
+        elif os.path.exists(self.rotated_log_path):
+            # Finish the interrupted compaction before a new one gets the
+            # chance to rotate over the log.
+            self._install_snapshot(dict(self.records))
+
+        for index in self.indexes.values():
+            index.rebuild(self.records)
+        self._snapshot_size = len(self.records)
+        self._open_log()
+
+    def _open_log(self):
+        if self._log_file is not None:
+            self._log_file.close()
+        self._log_file = open(self.log_path, 'a')
+        if self._log_file.tell() == 0:
+            self._log_file.write(COMPACT.dumps({"op": "header", "generation": self.generation}) + '\n')
+            self._log_file.flush()
+        if self.shared:
+            if self._tail is not None:
+                self._tail.close()
+            self._tail = open(self.log_path, 'rb')
+            stat = os.fstat(self._tail.fileno())
+            self._tail_ino = stat.st_ino
+            self._tail_offset = stat.st_size
+
+    def _read_snapshot(self, path: str):
+        # Either format may be found at any snapshot path; the magic tells them apart
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as db_file:
+            if os.fstat(db_file.fileno()).st_size == 0:
+                return {}
+            with mmap.mmap(db_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if mapped[:len(BINARY_MAGIC)] == BINARY_MAGIC:
+                    with memoryview(mapped) as view:
+                        return self._read_binary(path, view)
+                content = mapped[:]
+        if not content.strip():
+            return {}
+        if content.startswith(CHECKSUM_PREFIX):
+            digest_end = len(CHECKSUM_PREFIX) + 64
+            body = content[digest_end + len(RECORDS_PREFIX):-1]
+            if hashlib.sha256(body).hexdigest().encode() != content[len(CHECKSUM_PREFIX):digest_end]:
+                raise CorruptSnapshotError(f"Checksum mismatch in {path}")
+            content = body
+        try:
+            return COMPACT.loads(content)
+        except json.JSONDecodeError as e:
+            raise CorruptSnapshotError(f"Unreadable snapshot {path}") from e
+
+    def _read_binary(self, path: str, view: memoryview) -> dict:
+        if len(view) < BINARY_HEADER.size:
+            raise CorruptSnapshotError(f"Truncated snapshot {path}")
+        _, version, digest = BINARY_HEADER.unpack_from(view)
+        if version != BINARY_VERSION:
+            raise UnsupportedSnapshotError(f"Unsupported snapshot version {version} in {path}")
+        with view[BINARY_HEADER.size:] as payload:
+            if digest != bytes(len(digest)) and hashlib.sha256(payload).digest() != digest:
+                raise CorruptSnapshotError(f"Checksum mismatch in {path}")
+            try:
+                data = _PlainUnpickler(io.BytesIO(payload)).load()
+                fields, records, columns = data['fields'], data['records'], data.get('columns')
+            except UnsupportedSnapshotError:
+                raise
+            except Exception as e:
+                raise CorruptSnapshotError(f"Unreadable snapshot {path}") from e
+        if fields is None:
+            return records
+        try:
+            return dict(zip(records, self.record_type.from_columns(fields, columns)))
+        except (TypeError, KeyError) as e:
+            raise UnsupportedSnapshotError(f"Snapshot {path} does not match the {self.record_type.__name__} "
+                                           f"record: {e}") from e
+
+    def _replay(self, log_path: str) -> int:
+        if not os.path.exists(log_path):
+            return 0
+        with open(log_path, 'rb') as log_file:
+            count, valid_bytes = self._replay_from(log_file)
+        if valid_bytes != os.path.getsize(log_path):
+            # Torn write at the tail of the log
+            os.truncate(log_path, valid_bytes)
+        return count
+
+    def _replay_from(self, log_file, indexed: bool = False) -> tuple:
+        count = 0
+        valid_bytes = 0
+        for line in log_file:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                entry = COMPACT.loads(line)
+            except json.JSONDecodeError:
+                break
+            valid_bytes += len(line)
+            op = entry['op']
+            if op == 'header':
+                self.generation = entry['generation']
+                continue
+            if op == 'del':
+                self.records.pop(entry['key'], None)
+                if indexed:
+                    for index in self.indexes.values():
+                        index.remove(entry['key'])
+                count += 1
+                continue
+            changes = self._converted(entry['records'] if op == 'put_many' else {entry['key']: entry['value']})
+            self.records.update(changes)
+            if indexed:
+                for key, value in changes.items():
+                    for index in self.indexes.values():
+                        index.update(key, value)
+            count += len(changes)
+        return count, valid_bytes
+
+    @property
+    def version(self) -> tuple:
+        return self.generation, self._tail_offset
+
+    def locked(self, exclusive: bool = False, refresh: bool = True):
+        self.hydrate()
+        return self._locked(exclusive, refresh)
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False, refresh: bool = True):
+        if self._rwlock is None:
+            yield
+            return
+        if exclusive:
+            with self._rwlock.write(), self._file_lock(exclusive=True):
+                outermost = self._rwlock.write_depth == 1
+                if refresh and outermost and self.shared:
+                    self.refresh()
+                try:
+                    yield
+                finally:
+                    if outermost and self.shared:
+                        self.flush()
+            return
+        if refresh and self.shared and self._stale():
+            with self._rwlock.write(), self._file_lock(exclusive=False):
+                self.refresh()
+        with self._rwlock.read(), self._file_lock(exclusive=False):
+            yield
+
+    def _file_lock(self, exclusive: bool):
+        if not self.shared:
+            return nullcontext()
+        return self._flock(exclusive)
+
+    @contextmanager
+    def _flock(self, exclusive: bool):
+        # The reader/writer lock already guarantees that an exclusive holder is
+        # alone in this process, so the file lock is simply reference counted.
+        with self._flock_mutex:
+            if self._flock_depth == 0:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._flock_depth += 1
+        try:
+            yield
+        finally:
+            with self._flock_mutex:
+                self._flock_depth -= 1
+                if self._flock_depth == 0:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _stale(self) -> bool:
+        stat = os.stat(self.log_path)
+        return stat.st_ino != self._tail_ino or stat.st_size != self._tail_offset
+
+    def refresh(self):
+        # Called with the file lock held: catch up with other processes' appends
+        stat = os.stat(self.log_path)
+        if stat.st_ino == self._tail_ino and stat.st_size == self._tail_offset:
+            return
+        self._read_tail()
+        if stat.st_ino == self._tail_ino:
+            return
+        # Another process rotated the log. If the new log directly follows the
+        # one we finished reading we can keep going, otherwise reload.
+        generation = self.generation
+        self._open_log()
+        self._tail.seek(0)
+        self._tail_offset = 0
+        self._read_tail()
+        if self.generation != generation + 1:
+            self._log_file.close()
+            self._log_file = None
+            self._load()
+
+    def _read_tail(self):
+        self._tail.seek(self._tail_offset)
+        count, valid_bytes = self._replay_from(self._tail, indexed=True)
+        self._tail_offset += valid_bytes
+        self._log_count += count
+
+    def _converted(self, records: dict) -> dict:
+        if self.record_type is None:
+            return records
+        from_dict = self.record_type.from_dict
+        return {key: from_dict(value) for key, value in records.items()}
+
+    def put(self, key: str, value: dict):
+        if self.record_type is not None:
+            value = self.record_type.from_dict(value)
+        with self._lock:
+            with self._phase('mutate'):
+                self.records[key] = value
+                for index in self.indexes.values():
+                    index.update(key, value)
+            with self._phase('persist'):
+                self._append({"op": "put", "key": key, "value": value})
+
+    def put_many(self, records: dict):
+        # A batch is a single log line, so replay applies all of it or none
+        records = self._converted(records)
+        with self._lock:
+            with self._phase('mutate'):
+                self.records.update(records)
+                for key, value in records.items():
+                    for index in self.indexes.values():
+                        index.update(key, value)
+            with self._phase('persist'):
+                self._append({"op": "put_many", "records": records}, len(records))
+
+    def delete(self, key: str):
+        with self._lock:
+            with self._phase('mutate'):
+                self.records.pop(key, None)
+                for index in self.indexes.values():
+                    index.remove(key)
+            with self._phase('persist'):
+                self._append({"op": "del", "key": key})
+
+    def _append(self, entry: dict, count: int = 1):
+        self._pending.append(COMPACT.dumps(entry) + '\n')
+        self._log_count += count
+        if self.flush_policy.mode == FLUSH_ALWAYS or len(self._pending) >= self.flush_policy.max_pending:
+            self._write_pending()
+        if self._log_count >= max(self.compact_min_records, self._snapshot_size):
+            self._start_compaction()
+
+    def _write_pending(self):
+        if self._pending:
+            data = ''.join(self._pending)
+            self._log_file.write(data)
+            self._log_file.flush()
+            if self.instrumentation is not None:
+                self.instrumentation.record_write(self.name, 'log', len(data.encode()))
+            if self.flush_policy.fsync:
+                os.fsync(self._log_file.fileno())
+            self._pending = []
+            if self.shared:
+                # Our own records need not be read back on the next refresh
+                self._tail_offset = os.fstat(self._log_file.fileno()).st_size
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending)
+
+    def flush(self):
+        with self._lock:
+            if self._log_file is not None:
+                self._write_pending()
+
+    def compact(self, wait: bool = True):
+        with self.locked(exclusive=True), self._lock:
+            self._start_compaction()
+            compaction = self._compaction
+        if wait and compaction is not None:
+            compaction.join()
+
+    def _acquire_compact_lock(self, blocking: bool):
+        if not self.shared:
+            return None
+        lock_file = open(self.compact_lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        return lock_file
+
+    def _start_compaction(self):
+        # Called with the lock held. Records are replaced, never mutated in
+        # place, so a shallow copy is a consistent view of the collection.
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        compact_lock = self._acquire_compact_lock(blocking=False)
+        if compact_lock is False:
+            # Another process is compacting this collection
+            return
+        self._write_pending()
+        self._log_file.close()
+        os.replace(self.log_path, self.rotated_log_path)
+        self.generation += 1
+        self._log_file = None
+        self._open_log()
+        self._log_count = 0
+        snapshot = dict(self.records)
+        self._snapshot_size = len(snapshot)
+        self._compaction = threading.Thread(target=self._compact, args=(snapshot, compact_lock), daemon=True)
+        self._compaction.start()
+
+    def _compact(self, snapshot: dict, compact_lock):
+        try:
+            self._install_snapshot(snapshot)
+        finally:
+            _release(compact_lock)
+
+    def _binary_payload(self, snapshot: dict) -> bytes:
+        if self.record_type is None:
+            return pickle.dumps({"fields": None, "records": snapshot}, protocol=5)
+        return pickle.dumps({"fields": self.record_type.__slots__, "records": list(snapshot),
+                             "columns": self.record_type.columns_of(snapshot.values())}, protocol=5)
+
+    def _write_tmp_snapshot(self, snapshot: dict) -> str:
+        if self.snapshot_format == SNAPSHOT_BINARY:
+            payload = self._binary_payload(snapshot)
+            digest = hashlib.sha256(payload).digest() if self.checksum else bytes(32)
+            body = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, digest) + payload
+        else:
+            body = COMPACT.dumps(snapshot).encode()
+            if self.checksum:
+                body = CHECKSUM_PREFIX + hashlib.sha256(body).hexdigest().encode() + RECORDS_PREFIX + body + b'}'
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as db_file:
+            db_file.write(body)
+            db_file.flush()
+            os.fsync(db_file.fileno())
+        if self.instrumentation is not None:
+            self.instrumentation.record_write(self.name, 'snapshot', len(body))
+        return tmp_path
+
+    def _install_snapshot(self, snapshot: dict):
+        tmp_path = self._write_tmp_snapshot(snapshot)
+
+        # Every intermediate state leaves either the current snapshot with the
+        # rotated log, or the previous snapshot with the logs that follow it.
+        for stale_path in (self.prev_path, self.prev_log_path):
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+        if os.path.exists(self.path):
+            os.replace(self.path, self.prev_path)
+        else:
+            # Switching format: the snapshot in the other one becomes the previous
+            for other_path in filter(os.path.exists, self.other_paths):
+                os.replace(other_path, self.prev_path)
+        if os.path.exists(self.rotated_log_path):
+            os.replace(self.rotated_log_path, self.prev_log_path)
+        os.replace(tmp_path, self.path)
+        self._remove_other_formats()
+        _fsync_dir(os.path.dirname(self.path) or '.')
+
+    def _remove_other_formats(self):
+        for other_path in self.other_paths:
+            for stale_path in (other_path, other_path + '.prev'):
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+
+    def _recover_snapshot(self, snapshot: dict):
+        # The previous snapshot stays in place until the recovered one is
+        # durable; the corrupt file is kept aside for inspection.
+        if os.path.exists(self.path):
+            os.replace(self.path, self.path + '.corrupt')
+        tmp_path = self._write_tmp_snapshot(snapshot)
+        os.replace(tmp_path, self.path)
+        self._remove_other_formats()
+        _fsync_dir(os.path.dirname(self.path) or '.')
+        for stale_path in (self.rotated_log_path, self.prev_path, self.prev_log_path):
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+
+    def close(self):
+        if self._compaction is not None:
+            self._compaction.join()
+        with self._lock:
+            if self._log_file is not None:
+                self._write_pending()
+                self._log_file.close()
+                self._log_file = None
+            for handle in (self._tail, self._lock_file):
+                if handle is not None:
+                    handle.close()
+            self._tail = None
+            self._lock_file = None
+            self._tail_ino = None
+
+
+class ShardedCollection(Collection):
+    """
+    A collection partitioned by the value of ``shard_field`` into CollectionLog
+    shards under ``path``: one per value (e.g. one file per board for the
+    tasks) or, given ``buckets``, a fixed number of hash buckets.
+
+    ``manifest.json`` records the layout and the shards created so far, and a
+    directory collection maps every key to its shard. Using the collection
+    loads only the directory; a shard is loaded the first time its records,
+    its keys or its constraints are needed, so adding a task to a board parses
+    and appends to that board's shard alone, and compaction rewrites only the
+    shards that changed. Indexes and counters on ``shard_field`` and
+    constraints scoped by it are answered by the shard; other indexes are not
+    supported.
+
+    A batch spanning several shards is written as one log record per shard.
+    Shards are written before the directory, and keys that a crash left out of
+    the directory are restored when their shard is next loaded. Every write
+    also goes through the directory, so ``locked`` is the directory's lock and
+    writes to different shards still run one at a time.
+    """
+
+    def __init__(self, path: str, shard_field: str, buckets: int = None, flush_policy: FlushPolicy = None,
+                 checksum: bool = True, thread_safe: bool = False, record_type: type = None,
+                 snapshot_format: str = SNAPSHOT_JSON):
+        if buckets is not None and (type(buckets) is not int or buckets < 1):
+            raise ValueError("Invalid number of shard buckets")
+        self.path = path
+        self.name = os.path.basename(path)
+        self.manifest_path = os.path.join(path, 'manifest.json')
+        self.shard_field = shard_field
+        self.buckets = buckets
+        self.flush_policy = flush_policy
+        self.checksum = checksum
+        self.record_type = record_type
+        self.snapshot_format = snapshot_format
+        self.directory = CollectionLog(os.path.join(path, 'directory.json'), flush_policy=flush_policy,
+                                       checksum=checksum, thread_safe=thread_safe, snapshot_format=snapshot_format)
+        self.directory.name = f'{self.name}.directory'
+        self.records = ShardedRecords(self)
+        self._manifest = None
+        self._shards = {}
+        self._shards_lock = threading.Lock()
+
+    @property
+    def instrumentation(self):
+        return self.directory.instrumentation
+
+    @instrumentation.setter
+    def instrumentation(self, instrumentation):
+        self.directory.instrumentation = instrumentation
+
+    def shard_name(self, shard_value: str) -> str:
+        if self.buckets is not None:
+            return f'bucket-{zlib.crc32(str(shard_value).encode()) % self.buckets:04d}'
+        if not isinstance(shard_value, str) or os.path.basename(shard_value) != shard_value \
+                or shard_value.startswith('.') or shard_value in ('directory', 'manifest'):
+            raise ValueError(f"Invalid {self.shard_field}")
+        return shard_value
+
+    def shard(self, shard_value: str, create: bool = True):
+        """The loaded shard holding ``shard_value``, or None if it has no records yet and ``create`` is off."""
+        return self._open_shard(self.shard_name(shard_value), create)
+
+    def _open_shard(self, name: str, create: bool = True):
+        self.hydrate()
+        with self._shards_lock:
+            shard = self._shards.get(name)
+            if shard is not None:
+                return shard
+            if name not in self._manifest['shards']:
+                if not create:
+                    return None
+                self._manifest['shards'].append(name)
+                self._write_manifest()
+            shard = CollectionLog(os.path.join(self.path, f'{name}.json'), flush_policy=self.flush_policy,
+                                  checksum=self.checksum, record_type=self.record_type,
+                                  snapshot_format=self.snapshot_format)
+            shard.name = self.name
+            shard.instrumentation = self.instrumentation
+            shard.load()
+            missing = {key: name for key in shard.records if key not in self.directory.records}
+            if missing:
+                self.directory.put_many(missing)
+            self._shards[name] = shard
+            return shard
+
+    def _read_manifest(self) -> dict:
+        layout = {"shard_field": self.shard_field, "buckets": self.buckets}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as manifest_file:
+                manifest = COMPACT.loads(manifest_file.read())
+            if {field: manifest.get(field) for field in layout} != layout:
+                raise ValueError(f"{self.path} is sharded with a different layout")
+            return manifest
+        os.makedirs(self.path, exist_ok=True)
+        return {"format": MANIFEST_FORMAT, **layout, "shards": []}
+
+    def _write_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as manifest_file:
+            manifest_file.write(COMPACT.dumps(self._manifest))
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+        os.replace(tmp_path, self.manifest_path)
+        _fsync_dir(self.path)
+
+    def add_index(self, field: str, multi: bool = False):
+        if field != self.shard_field or multi:
+            raise ValueError(f"Sharded collections only index {self.shard_field}")
+        return ShardKeys(self)
+
+    def add_unique(self, field: str, scope: str = None):
+        if scope != self.shard_field:
+            raise ValueError(f"Sharded collections only enforce constraints scoped by {self.shard_field}")
+        return ShardUnique(self, field)
+
+    def scan(self, cursor: str = None):
+        # In the order tasks entered the directory, loading shards as they are reached
+        for key_cursor, key in self.directory.order.scan(cursor):
+            yield key_cursor, key, self.records[key]
+
+    def add_counter(self, field: str, count_field: str):
+        if field != self.shard_field:
+            raise ValueError(f"Sharded collections only count by {self.shard_field}")
+        return ShardCounter(self, count_field)
+
+    def add_digest(self, field: str):
+        if field != self.shard_field:
+            raise ValueError(f"Sharded collections only digest by {self.shard_field}")
+        return ShardDigest(self)
+
+    def put(self, key: str, value: dict):
+        self.put_many({key: value})
+
+    def put_many(self, records: dict):
+        names = {key: self.shard_name(value[self.shard_field]) for key, value in records.items()}
+        by_shard = {}
+        for key, value in records.items():
+            by_shard.setdefault(names[key], {})[key] = value
+        for name, shard_records in by_shard.items():
+            self._open_shard(name).put_many(shard_records)
+        moved = {key: name for key, name in names.items() if self.directory.records.get(key) != name}
+        for key in moved:
+            if key in self.directory.records:
+                # The record changed shard: drop the stale copy
+                self._open_shard(self.directory.records[key]).delete(key)
+        if moved:
+            self.directory.put_many(moved)
+
+    def delete(self, key: str):
+        name = self.directory.records.get(key)
+        if name is None:
+            return
+        self._open_shard(name).delete(key)
+        self.directory.delete(key)
+
+    def locked(self, exclusive: bool = False):
+        return self.directory.locked(exclusive)
+
+    def hydrate(self):
+        if self._manifest is None:
+            with self._shards_lock:
+                if self._manifest is None:
+                    self._manifest = self._read_manifest()
+                    if not os.path.exists(self.manifest_path):
+                        self._write_manifest()
+        self.directory.hydrate()
+
+    def _loaded_shards(self) -> list:
+        with self._shards_lock:
+            return list(self._shards.values())
+
+    def load(self):
+        for shard in self._loaded_shards():
+            shard.close()
+        with self._shards_lock:
+            self._shards = {}
+            self._manifest = None
+        self.directory.load()
+        self.hydrate()
+
+    def compact(self, wait: bool = True, all_shards: bool = False):
+        """Compact the directory and the loaded shards, or every shard with ``all_shards``."""
+        self.hydrate()
+        self.directory.compact(wait)
+        if all_shards:
+            for name in list(self._manifest['shards']):
+                self._open_shard(name)
+        for shard in self._loaded_shards():
+            shard.compact(wait)
+
+    @property
+    def dirty(self) -> bool:
+        return self.directory.dirty or any(shard.dirty for shard in self._loaded_shards())
+
+    def flush(self):
+        for shard in self._loaded_shards():
+            shard.flush()
+        self.directory.flush()
+
+    def close(self):
+        for shard in self._loaded_shards():
+            shard.close()
+        self.directory.close()
+
+
+class ShardedRecords(Mapping):
+    """Read-only mapping over every shard, loading a shard when one of its records is read."""
+
+    def __init__(self, collection: ShardedCollection):
+        self._collection = collection
+        self._directory = collection.directory.records
+
+    def __getitem__(self, key: str):
+        return self._collection._open_shard(self._directory[key]).records[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._directory
+
+    def __iter__(self):
+        return iter(self._directory)
+
+    def __len__(self) -> int:
+        return len(self._directory)
+
+
+class ShardKeys:
+    """Index on the shard field, answered by the shard holding the value."""
+
+    def __init__(self, collection: ShardedCollection):
+        self._collection = collection
+
+    def get(self, value) -> list:
+        shard = self._collection.shard(value, create=False)
+        if shard is None:
+            return []
+        if self._collection.buckets is None:
+            return list(shard.records)
+        return shard.add_index(self._collection.shard_field).get(value)
+
+    def __contains__(self, value) -> bool:
+        return bool(self.get(value))
+
+
+class ShardUnique:
+    """Constraint scoped by the shard field, checked within the shard holding the scope."""
+
+    def __init__(self, collection: ShardedCollection, field: str):
+        self._collection = collection
+        self._field = field
+
+    def is_taken(self, value, scope_value=None, exclude_key: str = None) -> bool:
+        shard = self._collection.shard(scope_value, create=False)
+        if shard is None:
+            return False
+        return shard.add_unique(self._field, scope=self._collection.shard_field).is_taken(value, scope_value,
+                                                                                          exclude_key)
+
+
+class ShardCounter:
+    """Counter by the shard field, answered by the shard holding the value."""
+
+    def __init__(self, collection: ShardedCollection, count_field: str):
+        self._collection = collection
+        self._count_field = count_field
+
+    def counts(self, value) -> dict:
+        shard = self._collection.shard(value, create=False)
+        if shard is None:
+            return {}
+        return shard.add_counter(self._collection.shard_field, self._count_field).counts(value)
+
+
+class ShardDigest:
+    """Digest by the shard field, answered by the shard holding the value."""
+
+    def __init__(self, collection: ShardedCollection):
+        self._collection = collection
+
+    def digest(self, value) -> str:
+        shard = self._collection.shard(value, create=False)
+        if shard is None:
+            return records_digest(())
+        return shard.add_digest(self._collection.shard_field).digest(value)
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    # Binary snapshots hold plain data only, so loading one never imports code
+    def find_class(self, module: str, name: str):
+        if (module, name) == ('builtins', 'Ellipsis'):
+            return Ellipsis
+        raise UnsupportedSnapshotError(f"Snapshot refers to {module}.{name}, but only plain data is loaded")
+
+
+@contextmanager
+def _gc_paused():
+    # Loading allocates an object per record; cyclic collections midway find
+    # nothing to free and only add time.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _fsync_dir(path: str):
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _release(lock_file):
+    if lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+
+class JsonBackend(StorageBackend):
+    """
+    The default backend: one CollectionLog per collection under ``db_dir``.
+
+    Collections are loaded in full the first time a call touches them, so a
+    process that only lists boards never parses the tasks. With ``shard_tasks``
+    tasks are partitioned by board instead, one file per board or, with
+    ``shard_buckets``, that many hash buckets (see ShardedCollection), and only
+    the shards of the boards a call works on are loaded. ``snapshot_format``
+    selects JSON or binary snapshots (see CollectionLog). With the ``group`` flush
+    policy a background thread flushes dirty collections every
+    ``interval_ms``; any deferred records are also flushed at interpreter exit.
+    """
+
+    def __init__(self, db_dir: str, flush_policy: FlushPolicy = None, shared: bool = False,
+                 thread_safe: bool = False, checksum: bool = True, shard_tasks: bool = False,
+                 shard_buckets: int = None, snapshot_format: str = SNAPSHOT_JSON):
+        if shared and shard_tasks:
+            raise ValueError("Sharded tasks cannot be shared between processes")
+        self.db_dir = db_dir
+        self.flush_policy = flush_policy or FlushPolicy()
+        self.shared = shared
+        self.thread_safe = thread_safe
+        self.locking = shared or thread_safe
+        self.checksum = checksum
+        self.shard_tasks = shard_tasks
+        self.shard_buckets = shard_buckets
+        self.snapshot_format = snapshot_format
+        self._collections = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = None
+        if self.flush_policy.mode != FLUSH_ALWAYS:
+            atexit.register(self.flush)
+        if self.flush_policy.mode == FLUSH_GROUP:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+
+    def collection(self, name: str) -> CollectionLog:
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                if name == 'tasks' and self.shard_tasks:
+                    collection = ShardedCollection(os.path.join(self.db_dir, name), 'board_id',
+                                                   buckets=self.shard_buckets, flush_policy=self.flush_policy,
+                                                   checksum=self.checksum, thread_safe=self.thread_safe,
+                                                   record_type=RECORD_TYPES.get(name),
+                                                   snapshot_format=self.snapshot_format)
+                else:
+                    collection = CollectionLog(os.path.join(self.db_dir, f'{name}.json'),
+                                               flush_policy=self.flush_policy, checksum=self.checksum,
+                                               shared=self.shared, thread_safe=self.thread_safe,
+                                               record_type=RECORD_TYPES.get(name),
+                                               snapshot_format=self.snapshot_format)
+                collection.instrumentation = self.instrumentation
+                self._collections[name] = collection
+            return collection
+
+    def rewrite_snapshots(self, names: tuple = COLLECTIONS):
+        """Compact every collection, and every shard, into a snapshot in ``snapshot_format``."""
+        for name in names:
+            collection = self.collection(name)
+            if isinstance(collection, ShardedCollection):
+                collection.compact(all_shards=True)
+            else:
+                collection.compact()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_policy.interval_ms / 1000):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            collections = list(self._collections.values())
+        for collection in collections:
+            if collection.dirty:
+                collection.flush()
+
+    def close(self):
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            for collection in self._collections.values():
+                collection.close()
+            self._collections = {}
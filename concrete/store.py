@@ -0,0 +1,152 @@
+import functools
+import threading
+from contextlib import ExitStack
+from typing import Optional
+
+from .backend import Collection, StorageBackend
+from .codec import COMPACT, JsonCodec
+from .instrumentation import InstrumentedCodec, Instrumentation
+from .responses import ResponseCache
+from .storage import FlushPolicy, JsonBackend
+
+DB_DIR = '../db'
+
+
+class DataStore:
+    """
+    Process-wide owner of every collection. Each collection is opened once and
+    loaded by the first call that touches it, and the same records and indexes
+    are shared by every User, Team and ProjectBoard instance the store is
+    injected into.
+
+    Collections live in a StorageBackend. By default that is a JsonBackend
+    under ``db_dir`` configured by the remaining arguments; pass ``backend``
+    to use another one, such as SqliteBackend.
+
+    Writes follow the store's FlushPolicy. With a deferred policy, call
+    ``flush()`` or use the store as a context manager to make sure buffered
+    mutations reach disk; pending records are also flushed at interpreter exit.
+
+    With ``shared`` set, several processes may serve the API from the same
+    directory: every call runs inside ``transaction()``, which locks the
+    collections it touches and first catches up with other processes' writes.
+
+    With ``thread_safe`` set (implied by ``shared``), the same transactions
+    take per-collection reader/writer locks, so one set of User, Team and
+    ProjectBoard instances can serve a thread pool: read APIs such as
+    ``list_boards`` or ``describe_user`` run in parallel and only mutations
+    serialise. Without it, instances must not be shared between threads.
+
+    Responses are serialised by ``codec``: compact JSON by default, or
+    ``codec=PRETTY`` for indented output meant for people.
+
+    Pass an Instrumentation to time every API call by phase and count the
+    bytes written per collection; ``stats()`` returns what it has recorded.
+
+    With ``response_cache_bytes``, the describe and list endpoints answer
+    repeated requests from a ResponseCache of that size, which mutations
+    invalidate through ``invalidate()``. Other processes' writes would not,
+    so it cannot be combined with ``shared``.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, db_dir: str = DB_DIR, flush_policy: FlushPolicy = None, shared: bool = False,
+                 thread_safe: bool = False, backend: StorageBackend = None, codec: JsonCodec = COMPACT,
+                 instrumentation: Instrumentation = None, response_cache_bytes: int = None):
+        self.backend = backend or JsonBackend(db_dir, flush_policy=flush_policy, shared=shared, thread_safe=thread_safe)
+        self.backend.instrumentation = instrumentation
+        self.shared = self.backend.shared
+        if response_cache_bytes is not None and self.shared:
+            raise ValueError("A response cache cannot be used with a shared store")
+        self.responses = ResponseCache(response_cache_bytes) if response_cache_bytes is not None else None
+        self.locking = self.backend.locking
+        self.instrumentation = instrumentation
+        self.codec = codec if instrumentation is None else InstrumentedCodec(codec, instrumentation)
+
+    @classmethod
+    def default(cls) -> 'DataStore':
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def collection(self, name: str) -> Collection:
+        return self.backend.collection(name)
+
+    def transaction(self, read: tuple = (), write: tuple = ()) -> ExitStack:
+        # Locks are always taken in name order so that processes cannot deadlock
+        stack = ExitStack()
+        with stack:
+            for name in sorted(set(read) | set(write)):
+                stack.enter_context(self.collection(name).locked(exclusive=name in write))
+            return stack.pop_all()
+
+    def try_read(self, names: tuple) -> Optional[ExitStack]:
+        """Read locks on ``names`` if every collection is loaded and none has to wait for a writer, else None."""
+        stack = ExitStack()
+        with stack:
+            for name in sorted(set(names)):
+                held = self.collection(name).try_locked()
+                if held is None:
+                    return None
+                stack.enter_context(held)
+            return stack.pop_all()
+
+    def hydrate(self, names: tuple):
+        for name in names:
+            self.collection(name).hydrate()
+
+    def flush(self):
+        self.backend.flush()
+
+    def invalidate(self, *tags: tuple):
+        """Drop the cached responses built from ``tags``, or all of them when none are given."""
+        if self.responses is None:
+            return
+        if tags:
+            self.responses.invalidate(*tags)
+        else:
+            self.responses.clear()
+
+    def stats(self) -> dict:
+        stats = self.instrumentation.stats() if self.instrumentation is not None else {}
+        if self.responses is not None:
+            stats["responses"] = self.responses.stats()
+        return stats
+
+    def close(self):
+        self.backend.close()
+        if self.instrumentation is not None and self.instrumentation.prometheus_path:
+            self.instrumentation.write_prometheus()
+
+    def __enter__(self) -> 'DataStore':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def transaction(read: tuple = (), write: tuple = ()):
+    """Run a User, Team or ProjectBoard method inside ``self.store.transaction``."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.store.locking:
+                self.store.hydrate(read + write)
+                return method(self, *args, **kwargs)
+            with self.store.transaction(read, write):
+                return method(self, *args, **kwargs)
+        wrapper.collections = read + write
+        return wrapper
+    return decorator
+
+
+def lazy_records(attribute: str) -> property:
+    """Property exposing the records of the collection held in ``attribute``, loading it on first access."""
+    def get(self):
+        collection = getattr(self, attribute)
+        collection.hydrate()
+        return collection.records
+    return property(get)
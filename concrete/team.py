@@ -1,31 +1,35 @@
-import json
-import os
 import uuid
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Iterator
 
-from team_base import TeamBase
+from ..team_base import TeamBase
 
-DB_PATH = '../db/teams.json'
+from . import records
+from .backend import scan_keys
+from .paging import PAGE_SIZE, is_paged, iterate_pages, read_page
+from .responses import cached
+from .store import DataStore, lazy_records, transaction
 
 class Team(TeamBase):
-    def __init__(self):
-        if not os.path.exists(DB_PATH):
-            os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-            with open(DB_PATH, 'w') as db_file:
-                json.dump({}, db_file)
-        self.load_teams()
+    teams = lazy_records('_teams_db')
+
+    def __init__(self, store: DataStore = None):
+        self.store = store or DataStore.default()
+        self._teams_db = self.store.collection('teams')
+        self._team_names = self._teams_db.add_unique('name')
+        if self.store.instrumentation is not None:
+            self.store.instrumentation.instrument(self)
 
     def load_teams(self):
-        with open(DB_PATH, 'r') as db_file:
-            self.teams = json.load(db_file)
+        self._teams_db.load()
+        self.store.invalidate()
 
     def save_teams(self):
-        with open(DB_PATH, 'w') as db_file:
-            json.dump(self.teams, db_file, indent=4)
+        self._teams_db.compact()
 
+    @transaction(write=('teams',))
     def create_team(self, request: str) -> str:
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
         team_id = str(uuid.uuid4())
         name = data['name']
         description = data['description']
@@ -34,36 +38,56 @@ class Team(TeamBase):
         if len(name) > 64 or len(description) > 128:
             raise ValueError("Team name or description exceeds maximum length")
 
-        if name in [team['name'] for team in self.teams.values()]:
+        if self._team_names.is_taken(name):
             raise ValueError("Team name must be unique")
 
-        team = {
-            "name": name,
-            "description": description,
-            "creation_time": datetime.now().isoformat(),
-            "admin": admin,
-            "users": [admin]
-        }
+        team = records.Team(
+            name=name,
+            description=description,
+            creation_time=datetime.now().isoformat(),
+            admin=admin,
+            users=[admin]
+        )
+
+        self._teams_db.put(team_id, team)
+        self.store.invalidate(('teams',))
+
+        return self.store.codec.dumps({"id": team_id})
 
-        self.teams[team_id] = team
-        self.save_teams()
+    @cached(lambda data: (('teams',),))
+    @transaction(read=('teams',))
+    def list_teams(self, request: str = None) -> str:
+        data = self.store.codec.loads(request) if request else {}
 
-        return json.dumps({"id": team_id})
+        if is_paged(data):
+            teams, cursor = self._teams_page(data)
+            return self.store.codec.dumps({"items": teams, "next_cursor": cursor})
 
-    def list_teams(self) -> str:
-        return json.dumps(list(self.teams.values()), indent=4)
+        teams, _ = read_page(self._teams_db.scan(), data, lambda team_id, team: team)
+        return self.store.codec.dumps(teams)
 
+    @transaction(read=('teams',))
+    def _teams_page(self, data: dict) -> tuple:
+        return read_page(self._teams_db.scan(data.get('cursor')), data,
+                         lambda team_id, team: {"id": team_id, **team})
+
+    def iter_teams(self, page_size: int = PAGE_SIZE, **filters) -> Iterator[dict]:
+        return iterate_pages(self._teams_page, filters, page_size)
+
+    @cached(lambda data: (('teams', data['id']),))
+    @transaction(read=('teams',))
     def describe_team(self, request: str) -> str:
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
         team_id = data['id']
 
         if team_id not in self.teams:
             raise ValueError("Team not found")
 
-        return json.dumps(self.teams[team_id], indent=4)
+        return self.store.codec.dumps(self.teams[team_id])
 
+    @transaction(write=('teams',))
     def update_team(self, request: str) -> str:
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
         team_id = data['id']
         team_details = data['team']
         name = team_details['name']
@@ -73,24 +97,24 @@ class Team(TeamBase):
         if len(name) > 64 or len(description) > 128:
             raise ValueError("Team name or description exceeds maximum length")
 
-        if name in [team['name'] for team in self.teams.values() if team != self.teams[team_id]]:
+        if self._team_names.is_taken(name, exclude_key=team_id):
             raise ValueError("Team name must be unique")
 
         if team_id not in self.teams:
             raise ValueError("Team not found")
 
-        team = self.teams[team_id]
-        team.update({
-            "name": name,
-            "description": description,
-            "admin": admin
-        })
-        self.save_teams()
+        self._teams_db.put(team_id, self.teams[team_id].replace(
+            name=name,
+            description=description,
+            admin=admin
+        ))
+        self.store.invalidate(('teams',), ('teams', team_id))
 
-        return json.dumps({"status": "success"})
+        return self.store.codec.dumps({"status": "success"})
 
+    @transaction(write=('teams',))
     def add_users_to_team(self, request: str):
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
         team_id = data['id']
         users = data['users']
 
@@ -98,16 +122,20 @@ class Team(TeamBase):
             raise ValueError("Team not found")
 
         team = self.teams[team_id]
-        if len(team['users']) + len(users) > 50:
+        members = dict.fromkeys(team['users'])
+        added = [user for user in dict.fromkeys(users) if user not in members]
+        if len(members) + len(added) > 50:
             raise ValueError("Cannot add more than 50 users to a team")
 
-        team['users'].extend(users)
-        self.save_teams()
+        if added:
+            self._teams_db.put(team_id, team.replace(users=[*members, *added]))
+            self.store.invalidate(('teams',), ('teams', team_id))
 
-        return json.dumps({"status": "success"})
+        return self.store.codec.dumps({"status": "success"})
 
+    @transaction(write=('teams',))
     def remove_users_from_team(self, request: str):
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
         team_id = data['id']
         users = data['users']
 
@@ -115,13 +143,29 @@ class Team(TeamBase):
             raise ValueError("Team not found")
 
         team = self.teams[team_id]
-        team['users'] = [user for user in team['users'] if user not in users]
-        self.save_teams()
+        removed = set(users)
+        members = [user for user in team['users'] if user not in removed]
+        if len(members) < len(team['users']):
+            self._teams_db.put(team_id, team.replace(users=members))
+            self.store.invalidate(('teams',), ('teams', team_id))
 
-        return json.dumps({"status": "success"})
+        return self.store.codec.dumps({"status": "success"})
 
+    @cached(lambda data: (('teams', data['id']),))
+    @transaction(read=('teams',))
     def list_team_users(self, request: str):
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
+
+        if is_paged(data):
+            user_details, cursor = self._team_users_page(data)
+            return self.store.codec.dumps({"items": user_details, "next_cursor": cursor})
+
+        user_details, _ = self._team_users_page({**data, 'limit': None})
+
+        return self.store.codec.dumps(user_details)
+
+    @transaction(read=('teams',))
+    def _team_users_page(self, data: dict) -> tuple:
         team_id = data['id']
 
         if team_id not in self.teams:
@@ -130,6 +174,12 @@ class Team(TeamBase):
         team = self.teams[team_id]
         users = team['users']
 
-        user_details = [{"id": user, "name": f"User {user}", "display_name": f"User {user}"} for user in users]
+        user_details = (
+            (cursor, user, {"id": user, "name": f"User {user}", "display_name": f"User {user}"})
+            for cursor, user in scan_keys(users, data.get('cursor'))
+        )
+
+        return read_page(user_details, data, lambda user, details: details)
 
-        return json.dumps(user_details, indent=4)
+    def iter_team_users(self, team_id: str, page_size: int = PAGE_SIZE, **filters) -> Iterator[dict]:
+        return iterate_pages(self._team_users_page, {**filters, 'id': team_id}, page_size)
@@ -1,80 +1,120 @@
-import json
-import os
 import uuid
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Iterator
 
-from user_base import UserBase
+from ..user_base import UserBase
 
-USER_DB_PATH = '../db/users.json'
-TEAM_DB_PATH = '../db/teams.json'
+from . import records
+from .paging import PAGE_SIZE, is_paged, iterate_pages, read_page
+from .responses import cached
+from .store import DataStore, lazy_records, transaction
 
 class User(UserBase):
-    def __init__(self):
-        if not os.path.exists(USER_DB_PATH):
-            os.makedirs(os.path.dirname(USER_DB_PATH), exist_ok=True)
-            with open(USER_DB_PATH, 'w') as db_file:
-                json.dump({}, db_file)
-        if not os.path.exists(TEAM_DB_PATH):
-            os.makedirs(os.path.dirname(TEAM_DB_PATH), exist_ok=True)
-            with open(TEAM_DB_PATH, 'w') as db_file:
-                json.dump({}, db_file)
-        self.load_users()
-        self.load_teams()
+    users = lazy_records('_users_db')
+    teams = lazy_records('_teams_db')
+
+    def __init__(self, store: DataStore = None):
+        self.store = store or DataStore.default()
+        self._users_db = self.store.collection('users')
+        self._teams_db = self.store.collection('teams')
+        self._user_names = self._users_db.add_unique('name')
+        self._teams_by_user = self._teams_db.add_index('users', multi=True)
+        if self.store.instrumentation is not None:
+            self.store.instrumentation.instrument(self)
 
     def load_users(self):
-        with open(USER_DB_PATH, 'r') as db_file:
-            self.users = json.load(db_file)
+        self._users_db.load()
+        self.store.invalidate()
 
     def save_users(self):
-        with open(USER_DB_PATH, 'w') as db_file:
-            json.dump(self.users, db_file, indent=4)
+        self._users_db.compact()
 
     def load_teams(self):
-        with open(TEAM_DB_PATH, 'r') as db_file:
-            self.teams = json.load(db_file)
+        self._teams_db.load()
+        self.store.invalidate()
 
     def save_teams(self):
-        with open(TEAM_DB_PATH, 'w') as db_file:
-            json.dump(self.teams, db_file, indent=4)
+        self._teams_db.compact()
 
-    def create_user(self, request: str) -> str:
-        data = json.loads(request)
-        user_id = str(uuid.uuid4())
+    def _build_user(self, data: dict) -> dict:
         name = data['name']
         display_name = data['display_name']
 
         if len(name) > 64 or len(display_name) > 64:
             raise ValueError("User name or display name exceeds maximum length")
 
-        if name in [user['name'] for user in self.users.values()]:
+        if self._user_names.is_taken(name):
             raise ValueError("User name must be unique")
 
-        user = {
-            "name": name,
-            "display_name": display_name,
-            "creation_time": datetime.now().isoformat()
-        }
+        return records.User(
+            name=name,
+            display_name=display_name,
+            creation_time=datetime.now().isoformat()
+        )
+
+    @transaction(write=('users',))
+    def create_user(self, request: str) -> str:
+        data = self.store.codec.loads(request)
+        user_id = str(uuid.uuid4())
+        user = self._build_user(data)
+
+        self._users_db.put(user_id, user)
+        self.store.invalidate(('users',))
+
+        return self.store.codec.dumps({"id": user_id})
+
+    @transaction(write=('users',))
+    def create_users(self, request: str) -> str:
+        data = self.store.codec.loads(request)
+        users = {}
+        names = set()
+
+        for user_data in data['users']:
+            user = self._build_user(user_data)
+            if user['name'] in names:
+                raise ValueError("User name must be unique")
+            names.add(user['name'])
+            users[str(uuid.uuid4())] = user
+
+        self._users_db.put_many(users)
+        self.store.invalidate(('users',))
+
+        return self.store.codec.dumps({"ids": list(users)})
+
+    @cached(lambda data: (('users',),))
+    @transaction(read=('users',))
+    def list_users(self, request: str = None) -> str:
+        data = self.store.codec.loads(request) if request else {}
+
+        if is_paged(data):
+            users, cursor = self._users_page(data)
+            return self.store.codec.dumps({"items": users, "next_cursor": cursor})
 
-        self.users[user_id] = user
-        self.save_users()
+        users, _ = read_page(self._users_db.scan(), data, lambda user_id, user: user)
+        return self.store.codec.dumps(users)
 
-        return json.dumps({"id": user_id})
+    @transaction(read=('users',))
+    def _users_page(self, data: dict) -> tuple:
+        return read_page(self._users_db.scan(data.get('cursor')), data,
+                         lambda user_id, user: {"id": user_id, **user})
 
-    def list_users(self) -> str:
-        return json.dumps(list(self.users.values()), indent=4)
+    def iter_users(self, page_size: int = PAGE_SIZE, **filters) -> Iterator[dict]:
+        return iterate_pages(self._users_page, filters, page_size)
 
+    @cached(lambda data: (('users', data['id']),))
+    @transaction(read=('users',))
     def describe_user(self, request: str) -> str:
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
         user_id = data['id']
 
         if user_id not in self.users:
             raise ValueError("User not found")
 
-        return json.dumps(self.users[user_id], indent=4)
+        return self.store.codec.dumps(self.users[user_id])
 
+    @transaction(write=('users',))
     def update_user(self, request: str) -> str:
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
         user_id = data['id']
         user_details = data['user']
         display_name = user_details['display_name']
@@ -85,16 +125,14 @@ class User(UserBase):
         if user_id not in self.users:
             raise ValueError("User not found")
 
-        user = self.users[user_id]
-        user.update({
-            "display_name": display_name
-        })
-        self.save_users()
+        self._users_db.put(user_id, self.users[user_id].replace(display_name=display_name))
+        self.store.invalidate(('users',), ('users', user_id))
 
-        return json.dumps({"status": "success"})
+        return self.store.codec.dumps({"status": "success"})
 
+    @transaction(read=('users', 'teams'))
     def get_user_teams(self, request: str) -> str:
-        data = json.loads(request)
+        data = self.store.codec.loads(request)
         user_id = data['id']
 
         if user_id not in self.users:
@@ -106,8 +144,7 @@ class User(UserBase):
                 "description": team['description'],
                 "creation_time": team['creation_time']
             }
-            for team in self.teams.values()
-            if user_id in team['users']
+            for team in map(self.teams.get, self._teams_by_user.get(user_id))
         ]
 
-        return json.dumps(user_teams, indent=4)
+        return self.store.codec.dumps(user_teams)
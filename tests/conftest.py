@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from ..concrete.project_board import ProjectBoard
+from ..concrete.store import DataStore
+from ..concrete.team import Team
+from ..concrete.user import User
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Exports are written under the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DataStore(str(tmp_path / 'db'))
+    yield store
+    store.close()
+
+
+class Api:
+    """User, Team and ProjectBoard over one store, taking and returning dicts."""
+
+    def __init__(self, store: DataStore):
+        self.store = store
+        self.users = User(store)
+        self.teams = Team(store)
+        self.boards = ProjectBoard(store)
+
+    def call(self, method, request: dict = None):
+        response = method(json.dumps(request)) if request is not None else method()
+        return json.loads(response)
+
+    def user(self, name: str) -> str:
+        return self.call(self.users.create_user, {"name": name, "display_name": name.title()})['id']
+
+    def team(self, name: str, admin: str) -> str:
+        return self.call(self.teams.create_team, {"name": name, "description": "", "admin": admin})['id']
+
+    def board(self, name: str, team_id: str) -> str:
+        return self.call(self.boards.create_board, {"name": name, "description": "", "team_id": team_id,
+                                                    "creation_time": "2024-01-01T00:00:00"})['id']
+
+    def task(self, title: str, board_id: str, user_id: str) -> str:
+        return self.call(self.boards.add_task, {"title": title, "description": "", "user_id": user_id,
+                                                "creation_time": "2024-01-01T00:00:00", "board_id": board_id})['id']
+
+
+@pytest.fixture
+def api(store):
+    return Api(store)
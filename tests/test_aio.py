@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ..concrete.aio import AsyncUser
+from ..concrete.instrumentation import Instrumentation
+from ..concrete.sqlite_backend import SqliteBackend
+from ..concrete.storage import JsonBackend
+from ..concrete.store import DataStore
+from ..concrete.user import User
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.submitted = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(fn, *args, **kwargs)
+
+
+@pytest.fixture
+def executor():
+    with CountingExecutor() as executor:
+        yield executor
+
+
+@pytest.fixture
+def user_id(tmp_path):
+    with DataStore(backend=JsonBackend(str(tmp_path / 'db'))) as store:
+        return json.loads(User(store).create_user(json.dumps({"name": "ada", "display_name": "Ada"})))['id']
+
+
+def describe(users: AsyncUser, user_id: str):
+    return users.describe_user(json.dumps({"id": user_id}))
+
+
+def test_reads_load_collections_in_the_executor_then_run_inline(tmp_path, executor, user_id):
+    with DataStore(backend=JsonBackend(str(tmp_path / 'db'), thread_safe=True)) as store:
+        users = AsyncUser(store, executor)
+
+        async def main():
+            first = await describe(users, user_id)
+            assert executor.submitted == 1
+            second = await describe(users, user_id)
+            assert executor.submitted == 1
+            return first, second
+
+        first, second = asyncio.run(main())
+        assert json.loads(first)['name'] == json.loads(second)['name'] == 'ada'
+
+
+def test_reads_of_an_instrumented_store_are_timed(tmp_path, executor, user_id):
+    instrumentation = Instrumentation()
+    with DataStore(backend=JsonBackend(str(tmp_path / 'db'), thread_safe=True),
+                   instrumentation=instrumentation) as store:
+        users = AsyncUser(store, executor)
+
+        async def main():
+            for _ in range(2):
+                await describe(users, user_id)
+
+        asyncio.run(main())
+        assert executor.submitted == 1
+    assert instrumentation.stats()["calls"]['User.describe_user']["count"] == 2
+
+
+def test_reads_do_not_wait_on_the_loop_for_a_writer(tmp_path, executor, user_id):
+    with DataStore(backend=JsonBackend(str(tmp_path / 'db'), thread_safe=True)) as store:
+        users = AsyncUser(store, executor)
+        store.hydrate(('users',))
+        holding, release = threading.Event(), threading.Event()
+
+        def writer():
+            with store.transaction(write=('users',)):
+                holding.set()
+                release.wait()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        holding.wait()
+
+        async def main():
+            read = asyncio.ensure_future(describe(users, user_id))
+            # The loop keeps running while the read waits in the executor
+            await asyncio.sleep(0.05)
+            assert executor.submitted == 1 and not read.done()
+            release.set()
+            return await read
+
+        assert json.loads(asyncio.run(main()))['name'] == 'ada'
+        thread.join()
+
+
+def test_reads_of_a_disk_backed_store_are_offloaded(tmp_path, executor):
+    with DataStore(backend=SqliteBackend(str(tmp_path / 'db.sqlite'))) as store:
+        user_id = json.loads(User(store).create_user(json.dumps({"name": "ada", "display_name": "Ada"})))['id']
+        users = AsyncUser(store, executor)
+
+        async def main():
+            for _ in range(2):
+                await describe(users, user_id)
+
+        asyncio.run(main())
+        assert executor.submitted == 2
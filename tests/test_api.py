@@ -0,0 +1,175 @@
+import os
+
+import pytest
+
+from ..concrete.store import DataStore
+from .conftest import Api
+
+
+@pytest.fixture
+def cached_api(tmp_path):
+    with DataStore(str(tmp_path / 'db'), response_cache_bytes=1 << 20) as store:
+        yield Api(store)
+
+
+@pytest.fixture
+def world(cached_api):
+    api = cached_api
+    admin = api.user('ada')
+    member = api.user('bob')
+    team_id = api.team('core', admin)
+    api.call(api.teams.add_users_to_team, {"id": team_id, "users": [member]})
+    board_id = api.board('Roadmap', team_id)
+    return {"admin": admin, "member": member, "team": team_id, "board": board_id}
+
+
+# Each mutating method, with a cached read whose response it has to change
+MUTATIONS = {
+    'create_user': (
+        lambda api, ids: api.call(api.users.list_users),
+        lambda api, ids: api.user('cy')),
+    'create_users': (
+        lambda api, ids: api.call(api.users.list_users),
+        lambda api, ids: api.call(api.users.create_users, {"users": [{"name": "cy", "display_name": ""}]})),
+    'update_user': (
+        lambda api, ids: api.call(api.users.describe_user, {"id": ids['admin']}),
+        lambda api, ids: api.call(api.users.update_user, {"id": ids['admin'], "user": {"display_name": "A"}})),
+    'update_user_listed': (
+        lambda api, ids: api.call(api.users.list_users),
+        lambda api, ids: api.call(api.users.update_user, {"id": ids['admin'], "user": {"display_name": "A"}})),
+    'create_team': (
+        lambda api, ids: api.call(api.teams.list_teams),
+        lambda api, ids: api.team('ops', ids['admin'])),
+    'update_team': (
+        lambda api, ids: api.call(api.teams.describe_team, {"id": ids['team']}),
+        lambda api, ids: api.call(api.teams.update_team, {"id": ids['team'], "team": {
+            "name": "renamed", "description": "", "admin": ids['admin']}})),
+    'update_team_listed': (
+        lambda api, ids: api.call(api.teams.list_teams),
+        lambda api, ids: api.call(api.teams.update_team, {"id": ids['team'], "team": {
+            "name": "renamed", "description": "", "admin": ids['admin']}})),
+    'add_users_to_team': (
+        lambda api, ids: api.call(api.teams.list_team_users, {"id": ids['team']}),
+        lambda api, ids: api.call(api.teams.add_users_to_team, {"id": ids['team'], "users": [api.user('cy')]})),
+    'remove_users_from_team': (
+        lambda api, ids: api.call(api.teams.list_team_users, {"id": ids['team']}),
+        lambda api, ids: api.call(api.teams.remove_users_from_team, {"id": ids['team'], "users": [ids['member']]})),
+    'create_board': (
+        lambda api, ids: api.call(api.boards.list_boards, {"id": ids['team']}),
+        lambda api, ids: api.board('Backlog', ids['team'])),
+    'close_board': (
+        lambda api, ids: api.call(api.boards.list_boards, {"id": ids['team']}),
+        lambda api, ids: api.call(api.boards.close_board, {"id": ids['board']})),
+}
+
+
+@pytest.mark.parametrize('name', MUTATIONS)
+def test_mutations_invalidate_the_responses_they_change(cached_api, world, name):
+    read, mutate = MUTATIONS[name]
+    before = read(cached_api, world)
+    assert read(cached_api, world) == before
+    assert cached_api.store.stats()['responses']['hits'] > 0
+
+    mutate(cached_api, world)
+
+    assert read(cached_api, world) != before
+
+
+def test_loading_a_collection_drops_every_cached_response(cached_api, world):
+    cached_api.call(cached_api.users.list_users)
+    cached_api.users.load_users()
+
+    assert cached_api.store.stats()['responses']['entries'] == 0
+
+
+def assert_rejected(method, request: dict, api: Api):
+    with pytest.raises(ValueError):
+        api.call(method, request)
+
+
+def test_a_batch_of_users_is_created_entirely_or_not_at_all(api):
+    api.user('ada')
+    users = [{"name": "bob", "display_name": ""}, {"name": "ada", "display_name": ""}]
+    assert_rejected(api.users.create_users, {"users": users}, api)
+    users = [{"name": "bob", "display_name": ""}, {"name": "bob", "display_name": ""}]
+    assert_rejected(api.users.create_users, {"users": users}, api)
+
+    assert [user['name'] for user in api.call(api.users.list_users)] == ['ada']
+
+
+def test_a_batch_of_tasks_is_added_entirely_or_not_at_all(api):
+    admin = api.user('ada')
+    board_id = api.board('Roadmap', api.team('core', admin))
+    task = {"description": "", "user_id": admin, "creation_time": "2024-01-01T00:00:00", "board_id": board_id}
+    assert_rejected(api.boards.add_tasks, {"tasks": [{**task, "title": "Plan"}, {**task, "title": "x" * 65}]}, api)
+    assert_rejected(api.boards.add_tasks, {"tasks": [{**task, "title": "Plan"}, {**task, "title": "Plan"}]}, api)
+
+    assert len(api.boards.tasks) == 0
+
+
+def test_a_batch_of_status_updates_applies_entirely_or_not_at_all(api, store, tmp_path):
+    admin = api.user('ada')
+    board_id = api.board('Roadmap', api.team('core', admin))
+    task_id = api.task('Plan', board_id, admin)
+    updates = [{"id": task_id, "status": "COMPLETE"}, {"id": "missing", "status": "COMPLETE"}]
+    assert_rejected(api.boards.update_task_statuses, {"updates": updates}, api)
+    updates = [{"id": task_id, "status": "COMPLETE"}, {"id": task_id, "status": "DONE"}]
+    assert_rejected(api.boards.update_task_statuses, {"updates": updates}, api)
+    store.close()
+
+    reopened = DataStore(str(tmp_path / 'db'))
+    assert Api(reopened).boards.tasks[task_id]['status'] == "OPEN"
+    reopened.close()
+
+
+def test_board_summary_follows_task_status_changes(api):
+    admin = api.user('ada')
+    board_id = api.board('Roadmap', api.team('core', admin))
+    tasks = [api.task(f'Task {i}', board_id, admin) for i in range(4)]
+    updates = [{"id": tasks[0], "status": "COMPLETE"}, {"id": tasks[1], "status": "IN_PROGRESS"}]
+    api.call(api.boards.update_task_statuses, {"updates": updates})
+
+    summary = api.call(api.boards.board_summary, {"id": board_id})
+    assert summary['tasks'] == {"OPEN": 2, "IN_PROGRESS": 1, "COMPLETE": 1}
+    assert summary['total'] == 4
+    assert summary['progress'] == {"OPEN": 50.0, "IN_PROGRESS": 25.0, "COMPLETE": 25.0}
+    assert_rejected(api.boards.close_board, {"id": board_id}, api)
+
+    api.call(api.boards.update_task_statuses, {"updates": [{"id": task_id, "status": "COMPLETE"} for task_id in tasks]})
+    api.call(api.boards.close_board, {"id": board_id})
+    assert api.call(api.boards.board_summary, {"id": board_id})['status'] == "CLOSED"
+
+
+def team_members(api: Api, team_id: str) -> list:
+    return [user['id'] for user in api.call(api.teams.list_team_users, {"id": team_id})]
+
+
+def test_adding_users_to_a_team_skips_duplicates(api):
+    admin, bob, cy = api.user('ada'), api.user('bob'), api.user('cy')
+    team_id = api.team('core', admin)
+    api.call(api.teams.add_users_to_team, {"id": team_id, "users": [bob, admin, bob, cy, bob]})
+
+    assert team_members(api, team_id) == [admin, bob, cy]
+
+
+def test_the_team_limit_counts_distinct_members(api):
+    admin = api.user('ada')
+    team_id = api.team('core', admin)
+    users = [f'user-{i}' for i in range(49)]
+    api.call(api.teams.add_users_to_team, {"id": team_id, "users": users + users[:10] + [admin]})
+    assert len(team_members(api, team_id)) == 50
+
+    api.call(api.teams.add_users_to_team, {"id": team_id, "users": users[:5]})
+    assert_rejected(api.teams.add_users_to_team, {"id": team_id, "users": ['user-49']}, api)
+    assert team_members(api, team_id) == [admin] + users
+
+
+def test_adding_only_existing_members_writes_nothing(api, store):
+    admin, bob = api.user('ada'), api.user('bob')
+    team_id = api.team('core', admin)
+    api.call(api.teams.add_users_to_team, {"id": team_id, "users": [bob]})
+    log_path = store.collection('teams').log_path
+    size = os.path.getsize(log_path)
+
+    assert api.call(api.teams.add_users_to_team, {"id": team_id, "users": [bob, admin, bob]}) == {"status": "success"}
+    assert os.path.getsize(log_path) == size
@@ -0,0 +1,145 @@
+import json
+import os
+
+import pytest
+
+from ..concrete.exporters import EXPORT_CACHE, RenderPool, is_current, write_export
+from ..concrete.sqlite_backend import SqliteBackend
+from ..concrete.storage import JsonBackend
+from ..concrete.store import DataStore
+from .conftest import Api
+
+
+@pytest.fixture
+def board(api):
+    admin = api.user('ada')
+    board_id = api.board('Roadmap', api.team('core', admin))
+    api.task('Plan', board_id, admin)
+    return board_id, admin
+
+
+def export(api, board_id: str, export_format: str = 'txt') -> dict:
+    return api.call(api.boards.export_board, {"id": board_id, "format": export_format})
+
+
+def test_exports_are_reused_until_a_task_changes(api, board):
+    board_id, admin = board
+    assert export(api, board_id) == {"out_file": os.path.join('out', f'board_{board_id}.txt')}
+    assert 'stale' not in export(api, board_id)
+
+    task_id = api.task('Ship', board_id, admin)
+    assert export(api, board_id)['stale'] is True
+    EXPORT_CACHE.wait()
+    assert 'stale' not in export(api, board_id)
+
+    api.call(api.boards.update_task_status, {"id": task_id, "status": "COMPLETE"})
+    assert export(api, board_id)['stale'] is True
+    EXPORT_CACHE.wait()
+    with open(export(api, board_id)['out_file']) as out:
+        assert "Task: Ship" in out.read()
+
+
+def test_task_writes_leave_the_board_record_alone(api, board, store):
+    board_id, admin = board
+    boards_log = store.collection('boards').log_path
+    store.flush()
+    size = os.path.getsize(boards_log)
+
+    task_id = api.task('Ship', board_id, admin)
+    api.call(api.boards.update_task_status, {"id": task_id, "status": "IN_PROGRESS"})
+    store.flush()
+
+    assert os.path.getsize(boards_log) == size
+
+
+def test_jsonl_exports_hold_only_board_fields(api, board):
+    board_id, _ = board
+    with open(export(api, board_id, 'jsonl')['out_file']) as out:
+        header = json.loads(out.readline())
+    assert 'version' not in header
+    assert header['name'] == 'Roadmap'
+
+
+def test_a_stamp_only_matches_the_file_it_was_written_for():
+    board = {"name": "Roadmap", "description": "", "creation_time": "", "status": "OPEN"}
+    output_file = write_export('b1', board, [], 'txt', 'new')
+    assert is_current('b1', 'new', 'txt')
+
+    # A slower render of older content lands after the newer stamp
+    older = write_export('b2', board, [], 'txt', 'old')
+    with open(output_file + '.version') as version_file:
+        stamp = version_file.read()
+    os.replace(older, output_file)
+    with open(output_file + '.version', 'w') as version_file:
+        version_file.write(stamp)
+
+    assert not is_current('b1', 'new', 'txt')
+
+
+@pytest.mark.parametrize('backend', [
+    lambda path: SqliteBackend(str(path / 'db.sqlite')),
+    lambda path: JsonBackend(str(path / 'db'), shard_tasks=True),
+    lambda path: JsonBackend(str(path / 'db'), shard_tasks=True, shard_buckets=4),
+], ids=['sqlite', 'sharded', 'bucketed'])
+def test_exports_follow_task_changes_in_every_backend(tmp_path, backend):
+    with DataStore(backend=backend(tmp_path)) as store:
+        api = Api(store)
+        admin = api.user('ada')
+        board_id = api.board('Roadmap', api.team('core', admin))
+        other_board = api.board('Backlog', api.team('ops', admin))
+        task_id = api.task('Plan', board_id, admin)
+        assert 'stale' not in export(api, board_id)
+        assert 'stale' not in export(api, other_board)
+
+        api.task('Triage', other_board, admin)
+        assert 'stale' not in export(api, board_id)
+
+        api.call(api.boards.update_task_status, {"id": task_id, "status": "COMPLETE"})
+        assert export(api, board_id)['stale'] is True
+        EXPORT_CACHE.wait()
+
+
+def render_jobs(count: int, tasks_per_board: int) -> list:
+    board = {"name": "Roadmap", "description": "", "creation_time": "", "status": "OPEN"}
+    tasks = [(f't{i}', {"title": f"Task {i}", "description": "", "user_id": "u1", "status": "OPEN",
+                        "creation_time": ""}) for i in range(tasks_per_board)]
+    return [(f'b{i}', board, tasks, f'v{i}') for i in range(count)]
+
+
+def test_small_batches_render_in_process():
+    pool = RenderPool(min_tasks=100)
+    out_files = pool.render(render_jobs(3, 10))
+
+    assert pool._executor is None
+    assert all(is_current(board_id, f'v{board_id[1:]}', 'txt') for board_id in out_files)
+
+
+def test_large_batches_render_in_a_reused_pool():
+    pool = RenderPool(max_workers=2, min_tasks=100)
+    try:
+        out_files = pool.render(render_jobs(4, 50))
+        executor = pool._executor
+        pool.render(render_jobs(4, 50), 'csv')
+
+        assert executor is not None and pool._executor is executor
+        assert executor._mp_context.get_start_method() in ('forkserver', 'spawn')
+        assert all(is_current(board_id, f'v{board_id[1:]}', 'txt') for board_id in out_files)
+        assert all(is_current(board_id, f'v{board_id[1:]}', 'csv') for board_id in out_files)
+    finally:
+        pool.shutdown()
+
+
+def test_pool_workers_write_under_the_current_directory(tmp_path, monkeypatch):
+    pool = RenderPool(max_workers=2, min_tasks=100)
+    try:
+        pool.render(render_jobs(2, 50))
+        # Workers started in one working directory keep writing where the caller is now
+        moved = tmp_path / 'moved'
+        moved.mkdir()
+        monkeypatch.chdir(moved)
+        out_files = pool.render(render_jobs(2, 50))
+
+        assert out_files == {'b0': os.path.join('out', 'board_b0.txt'), 'b1': os.path.join('out', 'board_b1.txt')}
+        assert all(is_current(board_id, f'v{board_id[1:]}', 'txt') for board_id in out_files)
+    finally:
+        pool.shutdown()
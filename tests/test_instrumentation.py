@@ -0,0 +1,86 @@
+import os
+import pstats
+
+import pytest
+
+from ..concrete.instrumentation import PHASES, Instrumentation
+from ..concrete.store import DataStore
+from .conftest import Api
+
+
+def instrumented(tmp_path, instrumentation: Instrumentation) -> DataStore:
+    return DataStore(str(tmp_path / 'db'), instrumentation=instrumentation)
+
+
+def test_calls_are_counted_with_their_errors(tmp_path):
+    instrumentation = Instrumentation()
+    with instrumented(tmp_path, instrumentation) as store:
+        api = Api(store)
+        api.user('ada')
+        api.user('bob')
+        with pytest.raises(ValueError):
+            api.user('ada')
+        api.call(api.users.list_users)
+
+    calls = instrumentation.stats()["calls"]
+    assert set(calls) == {'User.create_user', 'User.list_users'}
+    create = calls['User.create_user']
+    assert (create["count"], create["errors"]) == (3, 1)
+    assert create["latency_buckets"]['+Inf'] == 3
+    assert (calls['User.list_users']["count"], calls['User.list_users']["errors"]) == (1, 0)
+
+
+def test_call_time_is_split_into_phases(tmp_path):
+    instrumentation = Instrumentation()
+    with instrumented(tmp_path, instrumentation) as store:
+        Api(store).user('ada')
+
+    stats = instrumentation.stats()
+    call = stats["calls"]['User.create_user']
+    assert set(call["phases"]) == set(PHASES)
+    assert all(call["phases"][phase] > 0 for phase in ('parse', 'mutate', 'persist', 'serialize'))
+    # validate is the remainder, so the phases add up to the whole call
+    assert sum(call["phases"].values()) == pytest.approx(call["seconds"])
+    assert stats["writes"]['users.log']["count"] == 1
+    assert stats["writes"]['users.log']["bytes"] > 0
+
+
+def test_write_prometheus_replaces_the_file(tmp_path):
+    path = str(tmp_path / 'metrics' / 'planner.prom')
+    instrumentation = Instrumentation(prometheus_path=path)
+    with instrumented(tmp_path, instrumentation) as store:
+        api = Api(store)
+        api.user('ada')
+        with pytest.raises(ValueError):
+            api.user('ada')
+        instrumentation.write_prometheus()
+        with open(path) as metrics_file:
+            assert 'planner_call_seconds_count{method="User.create_user"} 2\n' in metrics_file.read()
+        api.user('bob')
+
+    # Written again when the store closes
+    with open(path) as metrics_file:
+        lines = metrics_file.read().splitlines()
+    assert 'planner_call_seconds_count{method="User.create_user"} 3' in lines
+    assert 'planner_call_seconds_bucket{method="User.create_user",le="+Inf"} 3' in lines
+    assert 'planner_call_errors_total{method="User.create_user"} 1' in lines
+    assert any(line.startswith('planner_write_bytes_count{collection="users",kind="log"}') for line in lines)
+    assert os.listdir(tmp_path / 'metrics') == ['planner.prom']
+
+
+def test_profile_every_samples_one_call_in_n(tmp_path):
+    profile_dir = tmp_path / 'profiles'
+    instrumentation = Instrumentation(profile_every=2, profile_dir=str(profile_dir))
+    with instrumented(tmp_path, instrumentation) as store:
+        api = Api(store)
+        for name in ('ada', 'bob', 'cy', 'dee', 'eve'):
+            api.user(name)
+
+    assert sorted(os.listdir(profile_dir)) == ['User.create_user-2.prof', 'User.create_user-4.prof']
+    assert pstats.Stats(str(profile_dir / 'User.create_user-2.prof')).total_calls > 0
+
+
+@pytest.mark.parametrize('profile_every', [0, -1, 1.5])
+def test_invalid_profiling_interval_is_rejected(profile_every):
+    with pytest.raises(ValueError):
+        Instrumentation(profile_every=profile_every)
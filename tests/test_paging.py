@@ -0,0 +1,100 @@
+from ..concrete.backend import scan_keys
+from ..concrete.storage import CollectionLog
+
+
+def page_through(collection, limit: int, before_page=None) -> list:
+    keys = []
+    cursor = None
+    while True:
+        page = []
+        for key_cursor, key, _ in collection.scan(cursor):
+            if len(page) == limit:
+                break
+            page.append((key_cursor, key))
+        keys += [key for _, key in page]
+        if len(page) < limit:
+            return keys
+        cursor = page[-1][0]
+        if before_page is not None:
+            before_page(cursor, page)
+
+
+def test_pages_resume_after_the_cursor_of_a_large_collection(tmp_path):
+    collection = CollectionLog(str(tmp_path / 'items.json'))
+    collection.load()
+    keys = [f'key-{i}' for i in range(200000)]
+    collection.put_many({key: {"n": i} for i, key in enumerate(keys)})
+
+    assert page_through(collection, 100) == keys
+    collection.close()
+
+
+def test_removing_the_cursor_key_between_pages_continues_after_it(tmp_path):
+    collection = CollectionLog(str(tmp_path / 'items.json'))
+    collection.load()
+    keys = [f'key-{i}' for i in range(1000)]
+    collection.put_many({key: {"n": i} for i, key in enumerate(keys)})
+    removed = []
+
+    def remove_last_and_earlier(cursor, page):
+        # The key the cursor names, and one already returned
+        for key in (page[-1][1], page[0][1]):
+            collection.delete(key)
+            removed.append(key)
+
+    seen = page_through(collection, 100, remove_last_and_earlier)
+
+    assert seen == keys
+    assert sorted(collection.records) == sorted(set(keys) - set(removed))
+    collection.close()
+
+
+def test_cursors_survive_a_reload(tmp_path):
+    path = str(tmp_path / 'items.json')
+    collection = CollectionLog(path)
+    collection.load()
+    collection.put_many({f'key-{i}': {"n": i} for i in range(10)})
+    cursor = [key_cursor for key_cursor, key, _ in collection.scan()][4]
+    collection.close()
+
+    reopened = CollectionLog(path)
+    reopened.load()
+    assert [key for _, key, _ in reopened.scan(cursor)] == [f'key-{i}' for i in range(5, 10)]
+    reopened.close()
+
+
+def test_scan_keys_resumes_where_a_removed_key_was():
+    keys = ['a', 'b', 'c', 'd']
+    cursor = [key_cursor for key_cursor, key in scan_keys(keys)][1]
+    assert [key for _, key in scan_keys(keys, cursor)] == ['c', 'd']
+    assert [key for _, key in scan_keys(['a', 'c', 'd'], cursor)] == ['c', 'd']
+    assert [key for _, key in scan_keys(['x', 'a', 'b', 'c', 'd'], cursor)] == ['c', 'd']
+
+
+def test_removing_team_members_while_iterating_them(api):
+    admin = api.user('admin')
+    team_id = api.team('team', admin)
+    members = [api.user(f'member-{i}') for i in range(30)]
+    api.call(api.teams.add_users_to_team, {"id": team_id, "users": members})
+
+    seen = []
+    for user in api.teams.iter_team_users(team_id, page_size=7):
+        seen.append(user['id'])
+        if len(seen) % 7 == 0:
+            # Remove the member the next page's cursor names
+            api.call(api.teams.remove_users_from_team, {"id": team_id, "users": [user['id']]})
+
+    assert seen == [admin] + members
+
+
+def test_list_users_pages(api):
+    ids = [api.user(f'user-{i}') for i in range(25)]
+    items = []
+    request = {"limit": 10}
+    while True:
+        page = api.call(api.users.list_users, request)
+        items += [item['id'] for item in page['items']]
+        if page['next_cursor'] is None:
+            break
+        request['cursor'] = page['next_cursor']
+    assert items == ids
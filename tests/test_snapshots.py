@@ -0,0 +1,87 @@
+import hashlib
+import pickle
+
+import pytest
+
+from ..concrete.records import Task, TaskStatus
+from ..concrete.storage import (BINARY_HEADER, BINARY_MAGIC, BINARY_VERSION, CollectionLog, SNAPSHOT_BINARY,
+                                UnsupportedSnapshotError)
+
+TASK = {"title": "Write docs", "description": "", "user_id": "u1", "creation_time": "2024-01-01T00:00:00",
+        "board_id": "b1", "status": "OPEN"}
+
+
+def open_tasks(tmp_path) -> CollectionLog:
+    collection = CollectionLog(str(tmp_path / 'tasks.json'), record_type=Task, snapshot_format=SNAPSHOT_BINARY)
+    collection.load()
+    return collection
+
+
+def write_snapshot(path, version: int, data):
+    payload = pickle.dumps(data, protocol=5)
+    with open(path, 'wb') as snapshot_file:
+        snapshot_file.write(BINARY_HEADER.pack(BINARY_MAGIC, version, hashlib.sha256(payload).digest()) + payload)
+
+
+def compacted_twice(tmp_path) -> CollectionLog:
+    # Leaves both a snapshot and a previous one to recover from
+    collection = open_tasks(tmp_path)
+    collection.put('t1', TASK)
+    collection.compact()
+    collection.put('t2', dict(TASK, title="Review", status="COMPLETE"))
+    collection.compact()
+    collection.close()
+    return collection
+
+
+def test_binary_snapshots_round_trip_records(tmp_path):
+    collection = open_tasks(tmp_path)
+    collection.put('t1', TASK)
+    collection.put('t2', {"title": "Partial", "board_id": "b1", "status": "COMPLETE"})
+    collection.compact()
+    collection.close()
+
+    reopened = open_tasks(tmp_path)
+    assert dict(reopened.records['t1']) == dict(TASK, status=TaskStatus.OPEN)
+    assert dict(reopened.records['t2']) == {"title": "Partial", "board_id": "b1", "status": TaskStatus.COMPLETE}
+    assert reopened.records['t2'].board_id is reopened.records['t1'].board_id
+    reopened.close()
+
+
+def test_binary_snapshots_hold_plain_data_by_field_name(tmp_path):
+    collection = compacted_twice(tmp_path)
+    # Fields in another order than the record's slots still land by name
+    write_snapshot(collection.path, BINARY_VERSION, {"fields": ('status', 'title', 'board_id'), "records": ['t1'],
+                                                      "columns": [['IN_PROGRESS'], ['Moved'], ['b9']]})
+
+    reopened = open_tasks(tmp_path)
+    assert dict(reopened.records['t1']) == {"title": "Moved", "board_id": "b9", "status": TaskStatus.IN_PROGRESS}
+    reopened.close()
+
+
+def test_snapshot_with_an_unknown_field_is_unsupported_not_recovered(tmp_path):
+    collection = compacted_twice(tmp_path)
+    write_snapshot(collection.path, BINARY_VERSION, {"fields": ('title', 'priority'), "records": ['t1'],
+                                                      "columns": [['Write docs'], ['high']]})
+
+    with pytest.raises(UnsupportedSnapshotError):
+        open_tasks(tmp_path)
+    assert not (tmp_path / 'tasks.snap.corrupt').exists()
+
+
+def test_snapshot_referring_to_code_is_unsupported(tmp_path):
+    collection = compacted_twice(tmp_path)
+    write_snapshot(collection.path, BINARY_VERSION, {"fields": Task.__slots__, "records": ['t1'],
+                                                      "columns": [[Task.from_dict(TASK)]] * len(Task.__slots__)})
+
+    with pytest.raises(UnsupportedSnapshotError):
+        open_tasks(tmp_path)
+
+
+def test_snapshot_of_another_format_version_is_unsupported(tmp_path):
+    collection = compacted_twice(tmp_path)
+    write_snapshot(collection.path, BINARY_VERSION + 1, {"fields": None, "records": {}})
+
+    with pytest.raises(UnsupportedSnapshotError):
+        open_tasks(tmp_path)
+    assert (tmp_path / 'tasks.snap.prev').exists()
@@ -0,0 +1,226 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ..concrete.storage import FLUSH_GROUP, FLUSH_ON_CLOSE, CollectionLog, FlushPolicy, JsonBackend
+from ..concrete.store import DataStore
+from ..concrete.user import User
+from .conftest import Api
+
+
+def open_log(tmp_path, **kwargs) -> CollectionLog:
+    collection = CollectionLog(str(tmp_path / 'items.json'), **kwargs)
+    collection.load()
+    return collection
+
+
+def test_the_log_is_replayed_on_load(tmp_path):
+    collection = open_log(tmp_path)
+    collection.put('a', {"n": 1})
+    collection.put_many({'b': {"n": 2}, 'c': {"n": 3}})
+    collection.put('a', {"n": 4})
+    collection.delete('b')
+    collection.close()
+
+    assert open_log(tmp_path).records == {'a': {"n": 4}, 'c': {"n": 3}}
+
+
+def test_a_torn_tail_is_truncated_and_writing_continues(tmp_path):
+    collection = open_log(tmp_path)
+    collection.put('a', {"n": 1})
+    collection.close()
+    size = os.path.getsize(collection.log_path)
+    with open(collection.log_path, 'ab') as log_file:
+        log_file.write(b'{"op":"put","key":"b","val')
+
+    reopened = open_log(tmp_path)
+    assert reopened.records == {'a': {"n": 1}}
+    assert os.path.getsize(collection.log_path) == size
+    reopened.put('c', {"n": 3})
+    reopened.close()
+
+    assert open_log(tmp_path).records == {'a': {"n": 1}, 'c': {"n": 3}}
+
+
+def logged_names(db_dir: str) -> list:
+    try:
+        with open(os.path.join(db_dir, 'users.log')) as log_file:
+            entries = [json.loads(line) for line in log_file]
+    except FileNotFoundError:
+        return []
+    return [entry['value']['name'] for entry in entries if entry['op'] == 'put']
+
+
+@pytest.mark.parametrize('mode', [FLUSH_GROUP, FLUSH_ON_CLOSE])
+def test_deferred_records_reach_the_log_on_flush_and_close(tmp_path, mode):
+    db_dir = str(tmp_path / 'db')
+    store = DataStore(db_dir, flush_policy=FlushPolicy(mode, interval_ms=60000))
+    api = Api(store)
+    api.user('ada')
+    api.user('bob')
+    assert logged_names(db_dir) == []
+    store.flush()
+    assert logged_names(db_dir) == ['ada', 'bob']
+
+    api.user('cy')
+    assert logged_names(db_dir) == ['ada', 'bob']
+    store.close()
+    assert logged_names(db_dir) == ['ada', 'bob', 'cy']
+
+
+def test_the_group_policy_flushes_on_its_interval(tmp_path):
+    db_dir = str(tmp_path / 'db')
+    with DataStore(db_dir, flush_policy=FlushPolicy(FLUSH_GROUP, interval_ms=10)) as store:
+        Api(store).user('ada')
+        deadline = time.monotonic() + 5
+        while not logged_names(db_dir) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert logged_names(db_dir) == ['ada']
+
+
+def test_max_pending_records_are_written_without_a_flush(tmp_path):
+    db_dir = str(tmp_path / 'db')
+    with DataStore(db_dir, flush_policy=FlushPolicy(FLUSH_ON_CLOSE, max_pending=3)) as store:
+        api = Api(store)
+        # Starts the log, whose header is a record of its own
+        api.user('ada')
+        store.flush()
+        api.user('bob')
+        api.user('cy')
+        assert logged_names(db_dir) == ['ada']
+        api.user('dee')
+        assert logged_names(db_dir) == ['ada', 'bob', 'cy', 'dee']
+        api.user('eve')
+        assert logged_names(db_dir) == ['ada', 'bob', 'cy', 'dee']
+
+    assert logged_names(db_dir) == ['ada', 'bob', 'cy', 'dee', 'eve']
+
+
+def compacted(tmp_path) -> CollectionLog:
+    # A snapshot, its predecessor and writes logged after both
+    collection = open_log(tmp_path)
+    collection.put('a', {"n": 1})
+    collection.compact()
+    collection.put('b', {"n": 2})
+    collection.compact()
+    collection.put('c', {"n": 3})
+    collection.close()
+    assert os.path.exists(collection.prev_path)
+    return collection
+
+
+def test_a_corrupt_snapshot_is_recovered_from_the_previous_one(tmp_path):
+    collection = compacted(tmp_path)
+    with open(collection.path, 'r+b') as snapshot_file:
+        snapshot_file.seek(-3, os.SEEK_END)
+        snapshot_file.write(b'###')
+
+    reopened = open_log(tmp_path)
+    assert reopened.records == {'a': {"n": 1}, 'b': {"n": 2}, 'c': {"n": 3}}
+    assert os.path.exists(collection.path + '.corrupt')
+    reopened.close()
+    assert open_log(tmp_path).records == reopened.records
+
+
+def test_an_interrupted_compaction_is_recovered_from_the_previous_snapshot(tmp_path):
+    collection = compacted(tmp_path)
+    # Crashed after retiring the snapshot, before installing the new one
+    os.remove(collection.path)
+
+    assert open_log(tmp_path).records == {'a': {"n": 1}, 'b': {"n": 2}, 'c': {"n": 3}}
+
+
+def create_users(db_dir: str, worker: int, count: int):
+    store = DataStore(db_dir, shared=True)
+    users = User(store)
+    for i in range(count):
+        users.create_user(json.dumps({"name": f"user-{worker}-{i}", "display_name": ""}))
+    store.close()
+
+
+def test_processes_sharing_a_directory_keep_every_write(tmp_path):
+    db_dir = str(tmp_path / 'db')
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=create_users, args=(db_dir, worker, 25)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    store = DataStore(db_dir)
+    names = [user['name'] for user in json.loads(User(store).list_users())]
+    store.close()
+    assert sorted(names) == sorted(f"user-{worker}-{i}" for worker in range(4) for i in range(25))
+
+
+def test_threads_sharing_a_thread_safe_store_keep_every_write(tmp_path):
+    db_dir = str(tmp_path / 'db')
+    with DataStore(db_dir, thread_safe=True) as store:
+        api = Api(store)
+        admin = api.user('ada')
+        board_id = api.board('Roadmap', api.team('core', admin))
+        writing = threading.Event()
+
+        def write(worker: int) -> list:
+            task_ids = []
+            for i in range(25):
+                task_id = api.task(f'Task {worker}-{i}', board_id, admin)
+                api.call(api.boards.update_task_status, {"id": task_id, "status": "COMPLETE"})
+                task_ids.append(task_id)
+            return task_ids
+
+        def read() -> int:
+            reads = 0
+            while writing.is_set() or not reads:
+                summary = api.call(api.boards.board_summary, {"id": board_id})
+                assert summary["total"] == sum(summary["tasks"].values())
+                reads += 1
+            return reads
+
+        writing.set()
+        with ThreadPoolExecutor(6) as executor:
+            readers = [executor.submit(read) for _ in range(2)]
+            writers = [executor.submit(write, worker) for worker in range(4)]
+            task_ids = [task_id for writer in writers for task_id in writer.result()]
+            writing.clear()
+            assert all(reader.result() for reader in readers)
+
+    with DataStore(db_dir) as store:
+        api = Api(store)
+        assert sorted(api.boards.tasks) == sorted(task_ids)
+        assert {task['title'] for task in api.boards.tasks.values()} == {
+            f'Task {worker}-{i}' for worker in range(4) for i in range(25)}
+        assert api.call(api.boards.board_summary, {"id": board_id})["tasks"]["COMPLETE"] == 100
+
+
+@pytest.mark.parametrize('buckets', [None, 4], ids=['sharded', 'bucketed'])
+def test_sharded_tasks_round_trip(tmp_path, buckets):
+    def open_store():
+        return DataStore(backend=JsonBackend(str(tmp_path / 'db'), shard_tasks=True, shard_buckets=buckets))
+
+    with open_store() as store:
+        api = Api(store)
+        admin = api.user('ada')
+        team_id = api.team('core', admin)
+        boards = [api.board(f'Board {i}', team_id) for i in range(6)]
+        tasks = {board_id: [api.task(f'Task {i}', board_id, admin) for i in range(3)] for board_id in boards}
+        api.call(api.boards.update_task_status, {"id": tasks[boards[0]][0], "status": "COMPLETE"})
+        store.collection('tasks').compact()
+        api.call(api.boards.update_task_status, {"id": tasks[boards[1]][0], "status": "IN_PROGRESS"})
+
+    with open_store() as store:
+        api = Api(store)
+        assert sorted(api.boards.tasks) == sorted(sum(tasks.values(), []))
+        statuses = {board_id: [api.boards.tasks[task_id]['status'] for task_id in tasks[board_id]]
+                    for board_id in boards}
+        assert statuses[boards[0]] == ["COMPLETE", "OPEN", "OPEN"]
+        assert statuses[boards[1]] == ["IN_PROGRESS", "OPEN", "OPEN"]
+        assert statuses[boards[2]] == ["OPEN", "OPEN", "OPEN"]
+        with pytest.raises(ValueError):
+            api.task('Task 0', boards[2], admin)